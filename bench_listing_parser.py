@@ -0,0 +1,76 @@
+"""Benchmark listing_parser against the BeautifulSoup parse_version it replaced.
+
+    python bench_listing_parser.py [rows ...]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bs4 import BeautifulSoup
+
+from listing_parser import iter_listing, latest_zip
+
+def generate_listing(rows: int, seed: int = 0) -> str:
+    """A 3GPP-style FTP-over-HTTP listing with `rows` entries (mostly .zip, some folders)"""
+    rng = random.Random(seed)
+    start = datetime(2000, 1, 1)
+    out = ["<html><body><table><thead><tr><th></th><th></th><th>Name</th><th>Date</th><th>Size</th></tr></thead><tbody>"]
+    for i in range(rows):
+        when = (start + timedelta(minutes=rng.randrange(12_000_000))).strftime("%Y/%m/%d %H:%M")
+        if i % 50 == 0:
+            href, size = f"https://www.3gpp.org/ftp/specs/archive/23_series/folder{i}/", "-"
+        else:
+            href, size = f"https://www.3gpp.org/ftp/specs/archive/23_series/23.002/{23000 + i}-i{i % 90:02d}.zip", f"{rng.uniform(10, 9000):.1f} KB"
+        out.append(
+            f'<tr><td><img src="/icons/zip.gif"></td><td></td>'
+            f'<td><a href="{href}">{os.path.basename(href.rstrip("/"))}</a></td>'
+            f"<td>{when}</td><td>{size}</td></tr>"
+        )
+    out.append("</tbody></table></body></html>")
+    return "\n".join(out)
+
+def bs4_parse_version(html: str):
+    """The original parse_version MCP tool, kept verbatim as the baseline"""
+    soup = BeautifulSoup(html, "html.parser")
+    files = []
+    for row in soup.select("tbody tr"):
+        cols = row.find_all("td")
+        if len(cols) < 5:
+            continue
+        a_tag = cols[2].find("a", href=True)
+        if not a_tag or not a_tag["href"].endswith(".zip"):
+            continue
+        filename = os.path.basename(a_tag["href"])
+        date_str = cols[3].get_text(strip=True)
+        try:
+            date_obj = datetime.strptime(date_str, "%Y/%m/%d %H:%M")
+        except Exception:
+            continue
+        files.append((filename, date_obj))
+    if not files:
+        return None
+    files.sort(key=lambda x: x[1], reverse=True)
+    return files[0][0]
+
+def best_of(fn, html: str, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main(sizes: list[int]):
+    print(f"{'rows':>8} {'bs4 (s)':>10} {'stream (s)':>11} {'speedup':>8}  entries")
+    for rows in sizes:
+        html = generate_listing(rows)
+        repeat = 3 if rows <= 5_000 else 1
+        bs4_time, expected = best_of(bs4_parse_version, html, repeat)
+        fast_time, entries = best_of(lambda page: list(iter_listing(page)), html, repeat)
+        assert latest_zip(entries) == expected, (latest_zip(entries), expected)
+        print(f"{rows:>8} {bs4_time:>10.3f} {fast_time:>11.3f} {bs4_time / fast_time:>7.1f}x  {len(entries)}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 5_000, 10_000])
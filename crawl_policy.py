@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+# ---------------------------
+# Adaptive crawl policy
+# ---------------------------
+@dataclass
+class TargetHistory:
+    change_times: list[float] = field(default_factory=list)
+    unchanged_polls: int = 0
+
+    @property
+    def last_change(self) -> Optional[float]:
+        return self.change_times[-1] if self.change_times else None
+
+    @property
+    def median_update_interval(self) -> Optional[float]:
+        gaps = [b - a for a, b in zip(self.change_times, self.change_times[1:]) if b > a]
+        return statistics.median(gaps) if gaps else None
+
+class AdaptiveCrawlPolicy:
+    """Decides how long to wait before polling a target again, without asking an LLM.
+
+    The configured frequency is the fastest a target is ever polled. Every poll that finds nothing
+    new stretches the interval by `backoff_factor` (up to `max_backoff` times the frequency).
+    Once the time since the last update approaches the target's typical update interval (learned
+    from when past versions first appeared), polling drops back to the configured frequency.
+    Intervals get +/- `jitter` so targets sharing a host drift apart.
+    """
+
+    def __init__(
+        self,
+        backoff_factor: float = 1.5,
+        max_backoff: float = 8.0,
+        jitter: float = 0.1,
+        update_window: float = 0.75,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+    ):
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.update_window = update_window
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._targets: dict[int, TargetHistory] = {}
+
+    def has_history(self, target_id: int) -> bool:
+        return target_id in self._targets
+
+    def load_history(self, target_id: int, change_times: list[float]):
+        """Seed a target with the times its past versions were first seen"""
+        self._targets[target_id] = TargetHistory(change_times=sorted(change_times))
+
+    def forget(self, target_id: int):
+        self._targets.pop(target_id, None)
+
+    def record_poll(self, target_id: int, changed: bool):
+        history = self._targets.setdefault(target_id, TargetHistory())
+        if changed:
+            history.change_times.append(self._clock())
+            history.unchanged_polls = 0
+        else:
+            history.unchanged_polls += 1
+
+    def in_update_window(self, target_id: int) -> bool:
+        history = self._targets.get(target_id)
+        if history is None or history.last_change is None or history.median_update_interval is None:
+            return False
+        return self._clock() - history.last_change >= self.update_window * history.median_update_interval
+
+    def _interval(self, target_id: int, frequency: float) -> float:
+        if self.in_update_window(target_id):
+            return frequency
+        history = self._targets.get(target_id) or TargetHistory()
+        return frequency * min(self.backoff_factor ** history.unchanged_polls, self.max_backoff)
+
+    def next_interval(self, target_id: int, frequency: float) -> float:
+        interval = self._interval(target_id, frequency) * (1 + self._rng.uniform(-self.jitter, self.jitter))
+        return max(interval, frequency * (1 - self.jitter))
+
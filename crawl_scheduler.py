@@ -0,0 +1,175 @@
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlparse
+
+# ---------------------------
+# Crawl targets
+# ---------------------------
+@dataclass
+class CrawlTarget:
+    id: int
+    url: str
+    frequency: int
+    active: bool = True
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url).netloc.lower()
+
+# ---------------------------
+# Per-host politeness
+# ---------------------------
+class HostGate:
+    """Caps concurrent requests to one host and spaces out their start times"""
+
+    def __init__(self, limit: int, delay: float, clock: Callable[[], float]):
+        self._sem = asyncio.Semaphore(limit)
+        self._delay = delay
+        self._clock = clock
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._sem.acquire()
+        now = self._clock()
+        start = max(now, self._next_start)
+        self._next_start = start + self._delay
+        if start > now:
+            await asyncio.sleep(start - now)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._sem.release()
+
+# ---------------------------
+# Scheduler
+# ---------------------------
+class CrawlScheduler:
+    """Deadline-ordered heap of crawl targets polled by a bounded set of workers.
+
+    Heap entries are (due, seq, target_id, generation); rescheduling a target bumps its
+    generation so older entries are dropped lazily when popped.
+    """
+
+    def __init__(
+        self,
+        poll: Callable[[CrawlTarget], Awaitable[None]],
+        wakeup_event: asyncio.Event,
+        max_workers: int = 8,
+        per_host_limit: int = 2,
+        host_delay: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        interval: Optional[Callable[[CrawlTarget], float]] = None,
+    ):
+        self._poll = poll
+        self._interval = interval or (lambda target: target.frequency)
+        self._wakeup = wakeup_event
+        self._workers = asyncio.Semaphore(max_workers)
+        self._per_host_limit = per_host_limit
+        self._host_delay = host_delay
+        self._clock = clock
+        self._targets: dict[int, CrawlTarget] = {}
+        self._generation: dict[int, int] = {}
+        self._heap: list[tuple[float, int, int, int]] = []
+        self._seq = 0
+        self._hosts: dict[str, HostGate] = {}
+        self._in_flight: dict[int, asyncio.Task] = {}
+
+    @property
+    def targets(self) -> list[CrawlTarget]:
+        return list(self._targets.values())
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def _push(self, target_id: int, due: float):
+        self._generation[target_id] = self._generation.get(target_id, 0) + 1
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, target_id, self._generation[target_id]))
+
+    def sync_targets(self, targets: list[CrawlTarget]):
+        """Add, update and drop targets so the heap matches `targets`"""
+        now = self._clock()
+        wanted = {t.id: t for t in targets if t.active}
+        for target_id in list(self._targets):
+            if target_id not in wanted:
+                del self._targets[target_id]
+                self._generation.pop(target_id, None)
+        for target_id, target in wanted.items():
+            current = self._targets.get(target_id)
+            self._targets[target_id] = target
+            if current is None or current.url != target.url:
+                self._push(target_id, now)
+            elif current.frequency != target.frequency:
+                self._push(target_id, now + target.frequency)
+
+    def wake(self, target_id: Optional[int] = None):
+        """Make one target (or every target) due immediately"""
+        now = self._clock()
+        ids = [target_id] if target_id is not None else list(self._targets)
+        for tid in ids:
+            if tid in self._targets and tid not in self._in_flight:
+                self._push(tid, now)
+        self._wakeup.set()
+
+    def seconds_until_next_due(self) -> Optional[float]:
+        while self._heap:
+            due, _, target_id, generation = self._heap[0]
+            if self._generation.get(target_id) != generation:
+                heapq.heappop(self._heap)
+                continue
+            return max(0.0, due - self._clock())
+        return None
+
+    def pop_due(self) -> list[CrawlTarget]:
+        """Pop every target whose deadline has passed"""
+        now = self._clock()
+        due_targets = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, target_id, generation = heapq.heappop(self._heap)
+            if self._generation.get(target_id) != generation or target_id in self._in_flight:
+                continue
+            due_targets.append(self._targets[target_id])
+        return due_targets
+
+    def _host_gate(self, host: str) -> HostGate:
+        gate = self._hosts.get(host)
+        if gate is None:
+            gate = self._hosts[host] = HostGate(self._per_host_limit, self._host_delay, self._clock)
+        return gate
+
+    async def _run_one(self, target: CrawlTarget):
+        try:
+            async with self._host_gate(target.host):
+                async with self._workers:
+                    await self._poll(target)
+        finally:
+            self._in_flight.pop(target.id, None)
+            if target.id in self._targets:
+                self._push(target.id, self._clock() + self._interval(self._targets[target.id]))
+                self._wakeup.set()
+
+    def dispatch_due(self):
+        for target in self.pop_due():
+            self._in_flight[target.id] = asyncio.create_task(self._run_one(target))
+
+    async def run(self, load_targets: Callable[[], list[CrawlTarget]], is_active: Callable[[], bool]):
+        """Poll due targets until cancelled; re-reads targets whenever the wakeup event fires"""
+        try:
+            while True:
+                self._wakeup.clear()
+                self.sync_targets(load_targets())
+                timeout = None
+                if is_active():
+                    self.dispatch_due()
+                    timeout = self.seconds_until_next_due()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in self._in_flight.values():
+                task.cancel()
@@ -0,0 +1,100 @@
+import asyncio
+import copy
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+class ConfigService:
+    """crawler_config.json held in memory.
+
+    Reads never touch the disk. `watch()` stats the file and reloads it only when its mtime
+    changes, e.g. after someone edits it by hand. Writes go to a temp file that is renamed over
+    the config, so readers never see a torn file. Subscribers are called with (old, new) after
+    every change.
+    """
+
+    def __init__(self, path: Path, normalize: Callable[[dict], dict] = lambda data: data):
+        self.path = Path(path)
+        self._normalize = normalize
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[dict, dict], None]] = []
+        self._mtime: Optional[float] = None
+        self._data = self._load()
+
+    def _load(self) -> dict:
+        try:
+            mtime = self.path.stat().st_mtime
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            mtime, data = None, {}
+        self._mtime = mtime
+        return self._normalize(data)
+
+    def get(self) -> dict:
+        """The current config; treat it as read-only and use update() to change it"""
+        return self._data
+
+    def subscribe(self, callback: Callable[[dict, dict], None]):
+        self._subscribers.append(callback)
+
+    def _notify(self, old: dict, new: dict):
+        if old == new:
+            return
+        for callback in self._subscribers:
+            try:
+                callback(old, new)
+            except Exception as e:
+                print(f"Config subscriber failed: {e}")
+
+    def _write_atomic(self, data: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._mtime = self.path.stat().st_mtime
+
+    def update(self, mutate: Callable[[dict], object]):
+        """Apply `mutate` to a copy of the config, persist it and notify subscribers; returns what `mutate` returns"""
+        with self._lock:
+            old = self._data
+            new = copy.deepcopy(old)
+            result = mutate(new)
+            new = self._normalize(new)
+            self._write_atomic(new)
+            self._data = new
+        self._notify(old, new)
+        return result
+
+    def reload_if_changed(self) -> bool:
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        with self._lock:
+            old = self._data
+            try:
+                self._data = self._load()
+            except json.JSONDecodeError:
+                # Half-written by an external editor; pick it up on the next check
+                return False
+        self._notify(old, self._data)
+        return True
+
+    async def watch(self, interval: float = 1.0):
+        """Reload on external edits until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            self.reload_if_changed()
@@ -1,18 +1,15 @@
 import asyncio
 import os
-import httpx
 import sqlite3
-from datetime import datetime
 from fastmcp import FastMCP, Context
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from llm.llm_endpoints import chat_completion
 from langsmith.run_helpers import traceable
+from http_fetcher import fetch_text, conditional_get, fetch_and_diff
+from listing_parser import iter_listing, latest_zip
 import json
 from pathlib import Path
-import base64
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Attachment, FileContent, FileName, FileType, Disposition
+from notifier import Notification, load_attachment, send_notification_batch
 
 # Load environment variables
 load_dotenv()
@@ -35,44 +32,31 @@ DB_PATH = r"C:\Users\342534\Desktop\Telecom Standards Management\backend\telecom
 @mcp.tool()
 async def fetch_url(url: str, ctx: Context) -> str:
     """Fetch HTML content from a URL"""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
-    }
-    async with httpx.AsyncClient(headers=headers) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        return resp.text
+    return await fetch_text(url)
+
+@traceable
+@mcp.tool()
+async def fetch_url_conditional(url: str, etag: str = None, last_modified: str = None, ctx: Context = None) -> dict:
+    """Fetch a URL with If-None-Match / If-Modified-Since; returns not_modified=True on a 304"""
+    return await conditional_get(url, etag, last_modified)
 
 @traceable
 @mcp.tool()
 def parse_version(html: str, ctx: Context) -> str:
     """Parse the latest .zip file in the folder page by uploaded date"""
-    soup = BeautifulSoup(html, "html.parser")
-    files = []
-    
-    for row in soup.select("tbody tr"):
-        cols = row.find_all("td")
-        if len(cols) < 5:
-            continue
-            
-        a_tag = cols[2].find("a", href=True)
-        if not a_tag or not a_tag["href"].endswith(".zip"):
-            continue
-            
-        filename = os.path.basename(a_tag["href"])
-        date_str = cols[3].get_text(strip=True)
-        
-        try:
-            date_obj = datetime.strptime(date_str, "%Y/%m/%d %H:%M")
-            files.append((filename, date_obj))
-        except Exception:
-            continue
-    
-    if not files:
-        return None
-        
-    files.sort(key=lambda x: x[1], reverse=True)
-    return files[0][0]
+    return latest_zip(iter_listing(html))
+
+@traceable
+@mcp.tool()
+def parse_listing_entries(html: str, ctx: Context) -> list[dict]:
+    """Parse every row of a directory listing into name, href, size (bytes) and timestamp"""
+    return [entry.to_dict() for entry in iter_listing(html)]
+
+@traceable
+@mcp.tool()
+async def fetch_and_diff_listing(url: str, last_known: str = None, etag: str = None, last_modified: str = None, ctx: Context = None) -> dict:
+    """Fetch, parse and compare a listing against the last known file in one call; returns only the delta"""
+    return await fetch_and_diff(url, last_known, etag, last_modified)
 
 @traceable
 @mcp.tool()
@@ -115,43 +99,28 @@ def should_crawl_reasoning_llm(last_checked: str, last_file: str, frequency: int
     
     return resp.strip().lower().startswith('yes')
 
+async def notify_recipients(recipients: list[str], subject: str, content: str, attachment_path: str = None, substitutions: dict = None) -> dict:
+    note = Notification(
+        subject=subject,
+        html_content=content,
+        recipients=recipients,
+        attachment=load_attachment(attachment_path) if attachment_path else None,
+        substitutions=substitutions or {},
+    )
+    return await send_notification_batch(note)
+
 @traceable
 @mcp.tool()
-def send_notification(to_email: str, subject: str, content: str, attachment_path: str = None, ctx: Context = None) -> int:
+async def send_notification(to_email: str, subject: str, content: str, attachment_path: str = None, ctx: Context = None) -> int:
     """Send email notification with optional attachment"""
-    from_email = 'telecomproject4@gmail.com' 
-    sendgrid_api_key = os.environ.get('SENDGRID_API_KEY') 
+    result = await notify_recipients([to_email], subject, content, attachment_path)
+    return result["statuses"].get(to_email)
 
-    message = Mail(
-        from_email=from_email,
-        to_emails=to_email,
-        subject=subject,
-        html_content=content
-    )
-
-    if attachment_path:
-        # Read and encode the file
-        with open(attachment_path, 'rb') as f:
-            data = f.read()
-        encoded_file = base64.b64encode(data).decode()
-
-        # Prepare the attachment
-        filename = os.path.basename(attachment_path)
-        attachment = Attachment(
-            FileContent(encoded_file),
-            FileName(filename),
-            FileType('application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
-            Disposition('attachment')
-        )
-        message.attachment = attachment
-
-    try:
-        sg = SendGridAPIClient(sendgrid_api_key)
-        response = sg.send(message)
-        return response.status_code
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return None
+@traceable
+@mcp.tool(name="send_notification_batch")
+async def send_notification_batch_tool(recipients: list[str], subject: str, content: str, attachment_path: str = None, substitutions: dict = None, ctx: Context = None) -> dict:
+    """Send one email to many recipients; returns sent/failed counts and a status per recipient"""
+    return await notify_recipients(recipients, subject, content, attachment_path, substitutions)
 
 if __name__ == "__main__":
     print("🚀 Starting MCP Server at http://127.0.0.1:8002/")
@@ -1,61 +1,61 @@
 import asyncio
 import os
-import httpx
-import sqlite3
 from datetime import datetime
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 from bs4 import BeautifulSoup
 import json
 from pathlib import Path
 import tempfile
 import zipfile
 from typing import List, Optional
-from docx import Document
-import aiofiles
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+from crawl_scheduler import CrawlScheduler, CrawlTarget
+from crawl_policy import AdaptiveCrawlPolicy
+from monitor_db import MonitorRepository
+from crawler_config import ConfigService
+from http_fetcher import download_file, DownloadTooLargeError
+from spec_documents import extract_main_document, extract_word_bytes, save_summary_to_docx, spec_tokens
+from document_jobs import DocumentJobRunner, DocumentJobTimeout
+from text_cache import text_cache
+from summarizer import IncrementalSummarizer
+from mcp_client_pool import McpClientPool, local_or_remote_opener
+from ws_broadcast import Broadcaster
+from event_log import LogRing
+
 # Import MCP client
-from fastmcp import Client
 from fastmcp.client.transports import SSETransport
 
 # MCP Server URL
 MCP_SERVER_URL = "http://127.0.0.1:8002/sse"
 
-# Global MCP client instance
-mcp_client = None
-
-async def get_mcp_client():
-    """Get or create MCP client"""
-    global mcp_client
-    if mcp_client is None:
-        transport = SSETransport(MCP_SERVER_URL)
-        mcp_client = Client(transport)
-        await mcp_client.__aenter__()
-    return mcp_client
+# "auto" calls the tools in-process when the server module is importable and falls back to
+# MCP_SERVER_URL otherwise; "inprocess" and "remote" force one path. The default module is the
+# server behind MCP_SERVER_URL, which has every tool this agent calls.
+MCP_TRANSPORT_MODE = os.environ.get("MCP_TRANSPORT", "auto")
+MCP_SERVER_MODULE = os.environ.get("MCP_SERVER_MODULE", "deepseek_python_20250920_2bc24e")
 
-# ---------------------------
-# Websocket manager
-# ---------------------------
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: set[WebSocket] = set()
+# The in-process server is only used if it provides every tool this agent calls
+REQUIRED_MCP_TOOLS = {"fetch_and_diff_listing", "should_crawl_reasoning_llm", "send_notification_batch"}
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.add(websocket)
+# Connections to the MCP server, shared by monitor_site, the crawl workers and notifications
+MCP_POOL_SIZE = int(os.environ.get("MCP_POOL_SIZE", "4"))
+MCP_CALL_TIMEOUT = float(os.environ.get("MCP_CALL_TIMEOUT", "120"))
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
+open_mcp_client = local_or_remote_opener(
+    MCP_SERVER_MODULE, lambda: SSETransport(MCP_SERVER_URL), REQUIRED_MCP_TOOLS, MCP_TRANSPORT_MODE
+)
+mcp_pool = McpClientPool(open_mcp_client, size=MCP_POOL_SIZE, call_timeout=MCP_CALL_TIMEOUT)
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections.copy():
-            try:
-                await connection.send_json(message)
-            except Exception:
-                self.disconnect(connection)
+async def call_mcp_tool(name: str, arguments: dict, timeout: Optional[float] = None):
+    return await mcp_pool.call_tool(name, arguments, timeout=timeout)
 
-manager = ConnectionManager()
+# ---------------------------
+# Websocket manager
+# ---------------------------
+# Each dashboard gets its own bounded queue and writer task, see ws_broadcast
+manager = Broadcaster()
 router = APIRouter()
 
 # ---------------------------
@@ -70,72 +70,128 @@ RECIPIENT_EMAILS = [
     "neelambuz.singh@nttdata.com"
 ]
 
-LATEST_STATUS = ""
+# Size cap for spec archives; crawler_config.json can override it with "max_download_mb"
+MAX_DOWNLOAD_MB = 200
 
-def update_latest_status(msg: str):
-    global LATEST_STATUS
-    LATEST_STATUS = msg
+# Recent log lines, numbered so pollers and reconnecting sockets can ask for what they missed
+LOG_RING_SIZE = 2000
+log_ring = LogRing(LOG_RING_SIZE)
+
+def log_message(event: dict) -> dict:
+    return {"type": "log", "data": event["message"], "seq": event["seq"], "ts": event["ts"]}
 
 def print_and_store(msg: str):
-    update_latest_status(msg)
-    try:
-        asyncio.create_task(manager.broadcast({"type": "log", "data": msg}))
-    except Exception:
-        pass
+    manager.publish(log_message(log_ring.append(msg)))
 
 async def broadcast_status():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT filename, url, status, last_checked FROM files ORDER BY last_checked DESC LIMIT 1")
-    row = c.fetchone()
-    conn.close()
+    row = await monitor_repo.get_latest_file()
     cfg = read_crawler_config()
     data = {
-        "filename": row[0] if row else None,
-        "url": row[1] if row else None,
-        "status": row[2] if row else None,
-        "last_checked": row[3] if row else None,
+        "filename": row["filename"] if row else None,
+        "url": row["url"] if row else None,
+        "status": row["status"] if row else None,
+        "last_checked": row["last_checked"] if row else None,
         "frequency": cfg["crawler_frequency"]
     }
-    await manager.broadcast({"type": "status", "data": data})
+    manager.publish({"type": "status", "data": data})
 
 # ---------------------------
 # Config helpers
 # ---------------------------
+DEFAULT_CRAWLER_URL = "https://www.3gpp.org/ftp/specs/archive/23_series/23.002"
+
+def normalize_crawler_config(data: dict) -> dict:
+    data.setdefault("crawler_active", False)
+    data.setdefault("crawler_frequency", 10)
+    data.setdefault("crawler_url", DEFAULT_CRAWLER_URL)
+    # Configs written before multi-target support only have crawler_url; that becomes target 1
+    data.setdefault("targets", [{
+        "id": 1,
+        "url": data["crawler_url"],
+        "frequency": data["crawler_frequency"],
+        "active": True
+    }])
+    return data
+
+config_service = ConfigService(CONFIG_PATH, normalize_crawler_config)
+
 def read_crawler_config():
-    if CONFIG_PATH.exists():
-        with open(CONFIG_PATH, "r") as f:
-            data = json.load(f)
-            data.setdefault("crawler_active", False)
-            data.setdefault("crawler_frequency", 10)
-            data.setdefault("crawler_url", "https://www.3gpp.org/ftp/specs/archive/23_series/23.002")
-            return data
-    else:
-        return {
-            "crawler_active": False,
-            "crawler_frequency": 10,
-            "crawler_url": "https://www.3gpp.org/ftp/specs/archive/23_series/23.002"
-        }
+    """In-memory config (read-only); reloaded by config_service.watch() when the file changes"""
+    return config_service.get()
+
+def get_crawl_targets(cfg: dict = None) -> list[CrawlTarget]:
+    cfg = cfg or read_crawler_config()
+    return [
+        CrawlTarget(
+            id=int(t["id"]),
+            url=t["url"],
+            frequency=int(t.get("frequency", cfg["crawler_frequency"])),
+            active=t.get("active", True)
+        )
+        for t in cfg["targets"]
+    ]
 
 crawler_wakeup_event = asyncio.Event()
 
-def write_crawler_config(active: bool = None, frequency: int = None, url: str = None):
-    cfg = read_crawler_config()
-    orig_active = cfg.get("crawler_active", False)
-    if active is not None:
-        cfg["crawler_active"] = active
-    if frequency is not None:
-        cfg["crawler_frequency"] = frequency
-    if url is not None:
-        cfg["crawler_url"] = url
-    CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(cfg, f)
-    if active is not None and active != orig_active:
-        try:
-            crawler_wakeup_event.set()
-        except Exception:
-            pass
+def write_crawler_config(active: bool = None, frequency: int = None, url: str = None, target_id: int = None):
+    def apply(cfg: dict):
+        nonlocal target_id
+        if active is not None:
+            cfg["crawler_active"] = active
+        if frequency is not None or url is not None:
+            target_id = 1 if target_id is None else target_id
+            target = next((t for t in cfg["targets"] if t["id"] == target_id), None)
+            if target is None:
+                # Only a URL update can create a target; the scheduler needs a URL to poll
+                if url is None:
+                    raise ValueError(f"Unknown crawl target {target_id}")
+                target = {"id": target_id, "url": url, "frequency": cfg["crawler_frequency"], "active": True}
+                cfg["targets"].append(target)
+            if frequency is not None:
+                target["frequency"] = frequency
+            if url is not None:
+                target["url"] = url
+            # Target 1 keeps the legacy single-target keys in sync
+            if target_id == 1:
+                cfg["crawler_frequency"] = target["frequency"]
+                cfg["crawler_url"] = target["url"]
+    config_service.update(apply)
+
+def add_crawl_targets(targets: list[dict]) -> list[int]:
+    """Append targets ({"url", "frequency"}) to the config and return their new ids"""
+    def apply(cfg: dict) -> list[int]:
+        next_id = max((t["id"] for t in cfg["targets"]), default=0) + 1
+        ids = []
+        for t in targets:
+            cfg["targets"].append({
+                "id": next_id,
+                "url": t["url"],
+                "frequency": int(t.get("frequency", cfg["crawler_frequency"])),
+                "active": t.get("active", True)
+            })
+            ids.append(next_id)
+            next_id += 1
+        return ids
+    return config_service.update(apply)
+
+def remove_crawl_target(target_id: int) -> bool:
+    if not any(t["id"] == target_id for t in read_crawler_config()["targets"]):
+        return False
+    config_service.update(lambda cfg: cfg.update(targets=[t for t in cfg["targets"] if t["id"] != target_id]))
+    return True
+
+def on_config_change(old: dict, new: dict):
+    """Wake the scheduler and push the new status to dashboards whenever the config changes"""
+    if new["crawler_active"] and not old.get("crawler_active"):
+        wake_crawler()
+    else:
+        crawler_wakeup_event.set()
+    try:
+        asyncio.create_task(broadcast_status())
+    except RuntimeError:
+        pass
+
+config_service.subscribe(on_config_change)
 
 # ---------------------------
 # Word document processing helpers
@@ -149,25 +205,14 @@ def extract_all_word_from_zip(zip_path: str, extract_dir: str) -> list[str]:
                 word_paths.append(os.path.abspath(extracted_path))
     return word_paths
 
-import docx2txt
-import doc2txt
-
 def extract_text_from_word(file_path: str) -> str:
     ext = os.path.splitext(file_path)[1].lower()
-    if ext == ".docx":
-        try:
-            return docx2txt.process(file_path) or ""
-        except Exception as e:
-            print(f"Error extracting .docx: {e}")
-            return ""
-    elif ext == ".doc":
-        try:
-            return doc2txt.extract_text(file_path) or ""
-        except Exception as e:
-            print(f"Error extracting .doc: {e}")
-            return ""
-    else:
+    if ext not in (".docx", ".doc"):
         return ""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    # Cached by content hash, so retries and the same archive under several targets skip re-extraction
+    return extract_word_bytes(data, ext)
 
 def select_main_word(word_paths: list[str]) -> str | None:
     max_lines = 0
@@ -196,79 +241,67 @@ def clean_summary_text(text: str) -> str:
     result = re.sub(r"\n{3,}", "\n\n", result)
     return result.strip()
 
-def save_summary_to_docx(summary: str, comparison: str, filepath: str, doc_name: str) -> None:
-    doc = Document()
-    doc.add_heading(f"Summary for {doc_name}", 0)
-    doc.add_heading("Overview (1-2 pages):", level=1)
-    doc.add_paragraph(summary)
-    doc.save(filepath)
+# ---------------------------
+# Document jobs (run off the event loop)
+# ---------------------------
+# crawler_config.json can set "document_executor" ("process" or "thread"),
+# "document_workers" and "document_job_timeout" (seconds)
+document_jobs: Optional[DocumentJobRunner] = None
+
+def get_document_jobs() -> DocumentJobRunner:
+    global document_jobs
+    if document_jobs is None:
+        cfg = read_crawler_config()
+        document_jobs = DocumentJobRunner(
+            max_workers=cfg.get("document_workers"),
+            executor=cfg.get("document_executor", "process"),
+            timeout=cfg.get("document_job_timeout", 300)
+        )
+    return document_jobs
+
+def shutdown_document_jobs():
+    global document_jobs
+    if document_jobs is not None:
+        document_jobs.shutdown()
+        document_jobs = None
 
 # ---------------------------
 # Database Helpers
 # ---------------------------
+monitor_repo = MonitorRepository(DB_PATH)
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        """CREATE TABLE IF NOT EXISTS files (
-               id INTEGER PRIMARY KEY,
-               filename TEXT UNIQUE,
-               url TEXT,
-               status TEXT,
-               last_checked TEXT
-           )"""
-    )
-    conn.commit()
-    conn.close()
-
-def add_file(filename: str, url: str, status: str):
-    current_time = datetime.now().isoformat() 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        """INSERT INTO files (filename, url, status, last_checked)
-           VALUES (?, ?, ?, ?)
-           ON CONFLICT(filename) DO UPDATE SET
-               status=excluded.status,
-               last_checked=excluded.last_checked""",
-        (filename, url, status, current_time)
-    )
-    conn.commit()
-    conn.close()
+    monitor_repo.init_schema()
+
+async def add_file(filename: str, url: str, status: str):
+    await monitor_repo.add_file(filename, url, status)
+
+async def get_latest_file(url: str = None):
+    return await monitor_repo.get_latest_file(url)
+
+async def get_update_times(url: str) -> list[float]:
+    """When each file under `url` was first seen, as POSIX timestamps, oldest first"""
+    return await monitor_repo.get_update_times(url)
 
-def get_latest_file():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT filename, url, last_checked FROM files ORDER BY last_checked DESC LIMIT 1")
-    row = c.fetchone()
-    conn.close()
-    return {"filename": row[0], "url": row[1], "last_checked": row[2]} if row else None
+def close_db():
+    monitor_repo.close()
 
 # ---------------------------
 # MCP Tool Wrapper Functions
 # ---------------------------
-async def fetch_url_via_mcp(url: str) -> str:
-    """Call MCP server to fetch URL"""
-    client = await get_mcp_client()
-    result = await client.call_tool("fetch_url", {"url": url})
-    return result.data
-
-async def parse_version_via_mcp(html: str) -> str:
-    """Call MCP server to parse version"""
-    client = await get_mcp_client()
-    result = await client.call_tool("parse_version", {"html": html})
-    return result.data
-
-async def compare_versions_via_mcp(old: str, new: str) -> str:
-    """Call MCP server to compare versions"""
-    client = await get_mcp_client()
-    result = await client.call_tool("compare_versions", {"old": old, "new": new})
+async def fetch_and_diff_via_mcp(url: str, last_known: str = None, etag: str = None, last_modified: str = None) -> dict:
+    """Call MCP server to fetch, parse and compare a listing in one round trip"""
+    result = await call_mcp_tool("fetch_and_diff_listing", {
+        "url": url,
+        "last_known": last_known,
+        "etag": etag,
+        "last_modified": last_modified
+    })
     return result.data
 
 async def should_crawl_reasoning_via_mcp(last_checked: str, last_file: str, frequency: int, current_time: str) -> bool:
     """Call MCP server for crawl decision"""
-    client = await get_mcp_client()
-    result = await client.call_tool("should_crawl_reasoning_llm", {
+    result = await call_mcp_tool("should_crawl_reasoning_llm", {
         "last_checked": last_checked,
         "last_file": last_file,
         "frequency": frequency,
@@ -276,24 +309,13 @@ async def should_crawl_reasoning_via_mcp(last_checked: str, last_file: str, freq
     })
     return result.data
 
-async def send_notification_via_mcp(to_email: str, subject: str, content: str, attachment_path: str = None) -> int:
-    """Call MCP server to send notification"""
-    client = await get_mcp_client()
-    
+async def send_notification_batch_via_mcp(recipients: list[str], subject: str, content: str, attachment_path: str = None) -> dict:
+    """Call MCP server to send one notification to every recipient"""
+    arguments = {"recipients": recipients, "subject": subject, "content": content}
     if attachment_path:
-        result = await client.call_tool("send_notification", {
-            "to_email": to_email,
-            "subject": subject,
-            "content": content,
-            "attachment_path": attachment_path
-        })
-    else:
-        result = await client.call_tool("send_notification", {
-            "to_email": to_email,
-            "subject": subject,
-            "content": content
-        })
-    
+        arguments["attachment_path"] = attachment_path
+    # Retries with backoff happen inside the tool, so allow for them
+    result = await call_mcp_tool("send_notification_batch", arguments, timeout=max(MCP_CALL_TIMEOUT, 300))
     return result.data
 
 # ---------------------------
@@ -304,31 +326,42 @@ from llm.llm_endpoints import chat_completion
 # ---------------------------
 # Agent Logic
 # ---------------------------
-async def monitor_site():
-    url = read_crawler_config()["crawler_url"]
-    
-    # Use MCP tool instead of local function
-    html = await fetch_url_via_mcp(url)
+# Validators of the last listing fully processed per URL, sent back as
+# If-None-Match / If-Modified-Since so unchanged listings come back as a 304
+listing_validators: dict[str, dict] = {}
+# Last file recorded per directory URL, so an unchanged listing needs no database read
+last_known_files: dict[str, Optional[str]] = {}
+
+async def last_known_file(dir_url: str) -> Optional[str]:
+    if dir_url not in last_known_files:
+        last_seen = await get_latest_file(dir_url)
+        last_known_files[dir_url] = os.path.basename(last_seen["filename"]) if last_seen else None
+    return last_known_files[dir_url]
+
+async def monitor_site(url: str = None):
+    url = url or read_crawler_config()["crawler_url"]
+    listing_url = url
+    dir_url = url if url.endswith('/') else url + '/'
+
+    # One MCP call fetches, parses and compares server-side; only the delta comes back
+    delta = await fetch_and_diff_via_mcp(url, await last_known_file(dir_url), **listing_validators.get(listing_url, {}))
+    if delta["not_modified"]:
+        print(f"No change at {url} since last check.")
+        print_and_store(f"No change at {url} since last check.")
+        return
     await asyncio.sleep(2)
-    
-    # Use MCP tool for parsing
-    latest_file = os.path.basename(await parse_version_via_mcp(html))
-    
+
+    latest_file = delta["latest_file"]
     if not latest_file:
         print(f"❌ No .zip files found at {url}")
         print_and_store(f"❌ No .zip files found at {url}")
         return
 
-    last_seen = get_latest_file()
-    last_filename = os.path.basename(last_seen["filename"]) if last_seen else None
-    
-    # Use MCP tool for comparison
-    decision = await compare_versions_via_mcp(last_filename or "", latest_file)
-
-    if not url.endswith('/'):
-        url += '/'
+    decision = delta["decision"]
+    url = dir_url
     file_url = url + latest_file
-    add_file(latest_file, url, decision)
+    await add_file(latest_file, url, decision)
+    last_known_files[dir_url] = latest_file
     await broadcast_status()
 
     if decision == "new version":
@@ -339,26 +372,37 @@ async def monitor_site():
         # Download and process the file
         with tempfile.TemporaryDirectory() as temp_dir:
             zip_path = os.path.join(temp_dir, latest_file)
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(file_url)
-                resp.raise_for_status()
-                async with aiofiles.open(zip_path, 'wb') as f:
-                    await f.write(resp.content)
-            print_and_store(f"Downloaded ZIP to {zip_path}")
-
-            word_paths = extract_all_word_from_zip(zip_path, temp_dir)
-            if not word_paths:
+            max_bytes = int(read_crawler_config().get("max_download_mb", MAX_DOWNLOAD_MB)) * 1024 * 1024
+            try:
+                download = await download_file(file_url, zip_path, max_bytes=max_bytes)
+            except DownloadTooLargeError as e:
+                print_and_store(f"❌ Skipping {latest_file}: {e}")
+                return
+            print_and_store(f"Downloaded ZIP to {zip_path} ({download['size']} bytes, sha256 {download['sha256']})")
+
+            # Rank members straight from the archive and extract only the chosen one,
+            # in a worker so the event loop keeps serving requests meanwhile
+            try:
+                document = await get_document_jobs().run(extract_main_document, zip_path, latest_file)
+            except DocumentJobTimeout as e:
+                print_and_store(f"❌ Document processing timed out: {e}")
+                return
+            except Exception as e:
+                # Includes a worker that died mid-job (BrokenProcessPool); the next tick retries
+                print_and_store(f"❌ Document processing failed for {latest_file}: {e!r}")
+                return
+            if not document["members"]:
                 print_and_store("No .docx or .doc files found in ZIP.")
                 return
 
-            main_word_path = select_main_word(word_paths)
+            main_word_path = document["main"]
             if not main_word_path:
                 print_and_store("Could not determine main Word file.")
                 return
 
             print_and_store(f"Main Word file selected: {main_word_path}")
 
-            main_text = extract_text_from_word(main_word_path)
+            main_text = document["text"]
             if not main_text.strip():
                 print_and_store("No extractable text found in Word file.")
                 return
@@ -366,23 +410,27 @@ async def monitor_site():
             print_and_store("Generating summary...")
             await asyncio.sleep(5)
 
-            chunk_size = 3000
-            chunks = [main_text[i:i+chunk_size] for i in range(0, len(main_text), chunk_size)]
-            summaries = []
-            for idx, chunk in enumerate(chunks):
-                summary = chat_completion(
-                    user_prompt=f"Summarize the following telecom standard document content (chunk {idx+1}):\n\n{chunk}",
-                    system_instruction="Summarize this technical content for a standards update digest. Focus on key changes, new features, and important scope."
+            # Chunks already summarized for an earlier version of this spec are reused from the summary store
+            summarizer = IncrementalSummarizer(chat_completion, on_progress=print_and_store)
+            archive_stem, spec_number = spec_tokens(latest_file)
+            final_summary, summary_stats = await summarizer.summarize_version(spec_number or archive_stem, latest_file, main_text)
+            if summary_stats["previous_version"]:
+                print_and_store(
+                    f"Reused {summary_stats['reused']}/{summary_stats['chunks']} chunk summaries "
+                    f"from {summary_stats['previous_version']}"
                 )
-                summaries.append(summary)
-            final_summary = "\n\n".join(summaries)
             print_and_store("Summary generated.")
             await asyncio.sleep(1.5)
 
             summary_docx_path = os.path.join(temp_dir, f"summary_{os.path.splitext(latest_file)[0]}.docx")
             cleaned_summary = clean_summary_text(final_summary)
-            save_summary_to_docx(cleaned_summary, "", summary_docx_path, os.path.basename(main_word_path))
-            print_and_store(f"Summary DOCX saved: {summary_docx_path}")
+            try:
+                await get_document_jobs().run(save_summary_to_docx, cleaned_summary, "", summary_docx_path, os.path.basename(main_word_path))
+                print_and_store(f"Summary DOCX saved: {summary_docx_path}")
+            except Exception as e:
+                # Still notify, just without the attachment
+                print_and_store(f"❌ Could not write summary DOCX: {e!r}")
+                summary_docx_path = None
 
             subject = f"New 3GPP File Available: {latest_file}"
             content = (
@@ -393,64 +441,105 @@ async def monitor_site():
             )
 
             print_and_store("Sending Email Notification with summary attached...")
-            for email in RECIPIENT_EMAILS:
-                status = await send_notification_via_mcp(email, subject, content, attachment_path=summary_docx_path)
-                if status == 200:
-                    print_and_store(f"Email sent successfully to {email}")
-                else:
+            result = await send_notification_batch_via_mcp(RECIPIENT_EMAILS, subject, content, attachment_path=summary_docx_path)
+            for email, status in result["statuses"].items():
+                if not (status and 200 <= status < 300):
                     print_and_store(f"Failed to send email to {email}, status: {status}")
-            print_and_store("Email Notification sent with summary attached!")
+            print_and_store(f"Email Notification sent with summary attached to {result['sent']} of {len(RECIPIENT_EMAILS)} recipients")
 
     else:
         print(f"No new file. Current latest: {latest_file}")
         print_and_store(f"No new file. Current latest: {latest_file}")
 
+    # Only remember the validators once the listing has been handled end to end,
+    # so a failed run is retried with a full fetch on the next tick
+    listing_validators[listing_url] = {
+        "etag": delta["etag"],
+        "last_modified": delta["last_modified"]
+    }
+
 # ---------------------------
 # Background Task
 # ---------------------------
 last_active = None
+crawl_scheduler: Optional[CrawlScheduler] = None
+crawl_policy = AdaptiveCrawlPolicy()
 
-async def background_monitor():
+MAX_CRAWL_WORKERS = 8
+PER_HOST_CRAWL_LIMIT = 2
+PER_HOST_CRAWL_DELAY = 1.0
+
+def wake_crawler(target_id: int = None):
+    """Make a target (or all targets) due now and wake the scheduler"""
+    if crawl_scheduler is not None:
+        crawl_scheduler.wake(target_id)
+    else:
+        crawler_wakeup_event.set()
+
+def crawl_interval(target: CrawlTarget) -> float:
+    return crawl_policy.next_interval(target.id, target.frequency)
+
+async def ask_llm_advisor(target: CrawlTarget, last) -> bool:
+    last_checked = last['last_checked'] if last and last['last_checked'] else "never"
+    last_file = last['filename'] if last else "none"
+
+    # Use MCP tool for decision making
+    now = datetime.now().isoformat()
+    return await should_crawl_reasoning_via_mcp(
+        last_checked=last_checked,
+        last_file=last_file,
+        frequency=target.frequency,
+        current_time=now
+    )
+
+async def crawl_target(target: CrawlTarget):
+    dir_url = target.url if target.url.endswith('/') else target.url + '/'
+    if not crawl_policy.has_history(target.id):
+        crawl_policy.load_history(target.id, await get_update_times(dir_url))
+    last = await get_latest_file(dir_url)
+
+    # The scheduler already spaces polls using crawl_policy; the LLM is only consulted when opted in
+    if read_crawler_config().get("crawl_llm_advisor", False) and not await ask_llm_advisor(target, last):
+        print(f"Agentic Reasoning: Decided not to crawl {target.url} this cycle.")
+        print_and_store(f"Agentic Reasoning: Decided not to crawl {target.url} this cycle.")
+        return
+
+    try:
+        await monitor_site(target.url)
+    except Exception as e:
+        print(f"❌ Too many requests to website: {e}")
+        print_and_store(f"Website is loading....")
+        return
+
+    latest = await get_latest_file(dir_url)
+    changed = bool(latest) and (last is None or latest["filename"] != last["filename"])
+    crawl_policy.record_poll(target.id, changed)
+
+def crawler_is_active() -> bool:
     global last_active
-    
-    while True:
-        cfg = read_crawler_config()
-        freq = cfg["crawler_frequency"]
-        if cfg["crawler_active"]:
-            last = get_latest_file()
-            last_checked = last['last_checked'] if last and last['last_checked'] else "never"
-            last_file = last['filename'] if last else "none"
-            
-            # Use MCP tool for decision making
-            now = datetime.now().isoformat()
-            should_crawl = await should_crawl_reasoning_via_mcp(
-                last_checked=last_checked,
-                last_file=last_file,
-                frequency=freq,
-                current_time=now
-            )
-            
-            if should_crawl:
-                try:
-                    await monitor_site()
-                except Exception as e:
-                    print(f"❌ Too many requests to website: {e}")
-                    print_and_store(f"Website is loading....")
-            else:
-                print("Agentic Reasoning: Decided not to crawl this cycle.")
-                print_and_store("Agentic Reasoning: Decided not to crawl this cycle.")
-        else:
-            if last_active != False:
-                print("🔌 Crawler is inactive.")
-                print_and_store("🔌 Crawler is inactive.")
-        last_active = cfg["crawler_active"]
-
-        try:
-            crawler_wakeup_event.clear()
-            await asyncio.wait_for(crawler_wakeup_event.wait(), timeout=freq)
-            continue
-        except asyncio.TimeoutError:
-            pass
+    active = read_crawler_config()["crawler_active"]
+    if not active and last_active != False:
+        print("🔌 Crawler is inactive.")
+        print_and_store("🔌 Crawler is inactive.")
+    last_active = active
+    return active
+
+async def background_monitor():
+    global crawl_scheduler
+    crawl_scheduler = CrawlScheduler(
+        poll=crawl_target,
+        wakeup_event=crawler_wakeup_event,
+        max_workers=MAX_CRAWL_WORKERS,
+        per_host_limit=PER_HOST_CRAWL_LIMIT,
+        host_delay=PER_HOST_CRAWL_DELAY,
+        interval=crawl_interval
+    )
+    config_watcher = asyncio.create_task(config_service.watch())
+    try:
+        await crawl_scheduler.run(get_crawl_targets, crawler_is_active)
+    finally:
+        config_watcher.cancel()
+        crawl_scheduler = None
 
 # ---------------------------
 # FastAPI Endpoints (UNCHANGED)
@@ -471,7 +560,6 @@ async def toggle_agent(body: AgentToggleRequest):
     write_crawler_config(active=body.active)
     msg = "🔌 Crawler activated." if body.active else "🔌 Crawler deactivated."
     print_and_store(msg)
-    await broadcast_status()
     return {"success": True, "active": body.active}
 
 class AgentUrlRequest(BaseModel):
@@ -480,8 +568,9 @@ class AgentUrlRequest(BaseModel):
 @router.post("/agent/{id}/url")
 async def set_url(id: int, payload: dict):
     new_url = payload.get("url")
-    write_crawler_config(url=new_url)
-    await broadcast_status()
+    if not new_url:
+        raise HTTPException(status_code=400, detail="url is required")
+    write_crawler_config(url=new_url, target_id=id)
     return {"success": True}
 
 class AgentFrequencyRequest(BaseModel):
@@ -490,33 +579,82 @@ class AgentFrequencyRequest(BaseModel):
 @router.post("/agent/{id}/frequency")
 async def set_frequency(id: int, payload: dict):
     new_freq = payload.get("frequency")
-    write_crawler_config(frequency=new_freq)
-    await broadcast_status()
+    try:
+        write_crawler_config(frequency=new_freq, target_id=id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     return {"success": True}
 
+@router.delete("/agent/{id}")
+async def delete_target(id: int):
+    removed = remove_crawl_target(id)
+    crawl_policy.forget(id)
+    return {"success": removed}
+
+@router.post("/agent/{id}/wake")
+async def wake_target(id: int):
+    wake_crawler(id)
+    return {"success": True}
+
+class CrawlTargetRequest(BaseModel):
+    url: str
+    frequency: Optional[int] = None
+
+@router.get("/monitor/targets")
+async def list_targets():
+    return [
+        {"id": t.id, "url": t.url, "frequency": t.frequency, "active": t.active}
+        for t in get_crawl_targets()
+    ]
+
+@router.post("/monitor/targets")
+async def create_targets(body: List[CrawlTargetRequest]):
+    ids = add_crawl_targets([t.model_dump(exclude_none=True) for t in body])
+    return {"success": True, "ids": ids}
+
 @router.get("/monitor/status")
 async def monitor_status():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT filename, url, status, last_checked FROM files ORDER BY last_checked DESC LIMIT 1")
-    row = c.fetchone()
-    conn.close()
+    row = await monitor_repo.get_latest_file()
     cfg = read_crawler_config()
     return [{
-        "filename": row[0] if row else None,
-        "url": row[1] if row else None,
-        "status": row[2] if row else None,
-        "last_checked": row[3] if row else None,
+        "filename": row["filename"] if row else None,
+        "url": row["url"] if row else None,
+        "status": row["status"] if row else None,
+        "last_checked": row["last_checked"] if row else None,
         "frequency": cfg["crawler_frequency"]
     }]
 
+@router.get("/monitor/mcp-latency")
+async def mcp_latency_stats():
+    return mcp_pool.metrics()
+
+@router.get("/monitor/ws-metrics")
+async def websocket_metrics():
+    return manager.metrics()
+
+@router.get("/monitor/text-cache")
+async def text_cache_stats():
+    return text_cache.stats()
+
 @router.get("/monitor/log")
-def get_latest_log():
-    return {"message": LATEST_STATUS}
+def get_latest_log(since: Optional[int] = None, limit: Optional[int] = None):
+    # Without ?since= only the latest line is returned, as legacy pollers expect
+    latest = log_ring.latest()
+    if since is None:
+        since = max(log_ring.last_seq - 1, 0)
+    return {"message": latest["message"] if latest else "", **log_ring.since(since, limit)}
 
 @router.websocket("/ws/monitor")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, since: Optional[int] = None):
+    # ?since=<seq> replays the log lines after <seq> before live messages; a "gap" message first
+    # tells the client when some of them were already overwritten (or the server restarted)
+    def backlog():
+        if since is None:
+            return []
+        missed = log_ring.since(since)
+        gap = [{"type": "gap", "data": {"first_seq": log_ring.first_seq, "reset": missed["reset"]}}] if missed["truncated"] or missed["reset"] else []
+        return gap + [log_message(event) for event in missed["events"]]
+    await manager.connect(websocket, backlog)
     try:
         while True:
             await websocket.receive_text()
@@ -528,7 +666,4 @@ async def websocket_endpoint(websocket: WebSocket):
 # ---------------------------
 async def cleanup_mcp_client():
     """Clean up MCP client when router is being shut down"""
-    global mcp_client
-    if mcp_client:
-        await mcp_client.__aexit__(None, None, None)
-        mcp_client = None
+    await mcp_pool.close()
@@ -6,7 +6,10 @@ import threading
 
 from utils import login
 from agents import monitoring_agent
-from agents.monitoring_agent import init_db, background_monitor, cleanup_mcp_client
+from agents.monitoring_agent import init_db, background_monitor, cleanup_mcp_client, shutdown_document_jobs, close_db
+from http_fetcher import close_http_client
+from small_logics import warmup_rag_clients, close_rag_clients, stream_rag_answer
+from rag_streaming import build_stream_router
 from DocumentUpload import document_uploader
 from agents import ai_assistant
 from agents.ai_assistant import router as ai_assistant_router
@@ -16,12 +19,20 @@ async def lifespan(app: FastAPI):
     init_db()
     asyncio.create_task(background_monitor())
     # No need to start MCP server here since it's standalone
+    # Requests don't wait for the RAG clients; the first one to need them builds them if warmup hasn't
+    warmup = asyncio.create_task(warmup_rag_clients())
     yield
+    warmup.cancel()
     # Clean up MCP client on shutdown
     await cleanup_mcp_client()
+    shutdown_document_jobs()
+    close_db()
+    await close_http_client()
+    await close_rag_clients()
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(ai_assistant_router, prefix="/api")
+app.include_router(build_stream_router(stream_rag_answer), prefix="/api")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:8081", "http://localhost:8080", "http://localhost:8080/workflows", "*"],
@@ -0,0 +1,81 @@
+import asyncio
+import concurrent.futures
+import os
+from typing import Callable, Optional
+
+DEFAULT_JOB_TIMEOUT = 300
+
+class DocumentJobTimeout(Exception):
+    """Raised when a document job runs past its timeout"""
+
+class DocumentJobRunner:
+    """Runs blocking document stages (ZIP inspection, text extraction, DOCX writing) off the event loop.
+
+    `executor` is "process" (default) or "thread". In process mode every job gets its own
+    single-worker pool, so a stuck or cancelled job can be killed without touching the others;
+    at most `max_workers` jobs run at once. Jobs must be top-level functions with picklable
+    arguments when running in processes.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, executor: str = "process", timeout: float = DEFAULT_JOB_TIMEOUT):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor_kind = executor
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._threads: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._running: set[concurrent.futures.ProcessPoolExecutor] = set()
+
+    @staticmethod
+    def _kill(executor: concurrent.futures.ProcessPoolExecutor):
+        """Stop a job's pool, terminating its worker so the job stops using CPU"""
+        # ProcessPoolExecutor has no public way to stop a running job
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    async def _run_in_thread(self, fn: Callable, args: tuple, timeout: float):
+        if self._threads is None:
+            self._threads = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix="doc-job")
+        future = self._threads.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.CancelledError:
+            # A thread that already started cannot be stopped; it finishes in the background
+            future.cancel()
+            raise
+
+    async def _run_in_process(self, fn: Callable, args: tuple, timeout: float):
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+        self._running.add(executor)
+        finished = False
+        try:
+            future = executor.submit(fn, *args)
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+            finished = True
+            return result
+        finally:
+            self._running.discard(executor)
+            if finished:
+                executor.shutdown(wait=False)
+            else:
+                self._kill(executor)
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None):
+        """Run `fn(*args)` off the loop; cancelling the awaiting task or hitting the timeout stops the job"""
+        timeout = timeout or self.timeout
+        async with self._slots:
+            try:
+                if self.executor_kind == "thread":
+                    return await self._run_in_thread(fn, args, timeout)
+                return await self._run_in_process(fn, args, timeout)
+            except asyncio.TimeoutError:
+                raise DocumentJobTimeout(f"{getattr(fn, '__name__', fn)} exceeded {timeout}s")
+
+    def shutdown(self):
+        for executor in list(self._running):
+            self._kill(executor)
+        self._running.clear()
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from sqlite_store import LruBlobStore
+
+EMBEDDING_CACHE_PATH = Path(__file__).with_name("embedding_cache.db")
+EMBEDDING_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def embedding_key(text: str, namespace: str) -> str:
+    """Cache key for `text` embedded by model `namespace`"""
+    return f"{namespace}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+class EmbeddingCache(LruBlobStore):
+    """Embedding vectors keyed by content hash, stored as float32 blobs in SQLite and evicted least-recently-used past `max_bytes`"""
+
+    def __init__(self, path: str | Path = EMBEDDING_CACHE_PATH, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        super().__init__(path, table="embedding_cache", value_column="vec", max_bytes=max_bytes)
+
+    def get_vectors(self, keys: list[str]) -> dict[str, np.ndarray]:
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in self.get_many(keys).items()}
+
+    def put_vectors(self, items: dict[str, np.ndarray]):
+        self.put_many({key: np.asarray(vec, dtype=np.float32).tobytes() for key, vec in items.items()})
+
+class CachedEmbeddings(Embeddings):
+    """Wraps a LangChain embedding model with EmbeddingCache.
+
+    Each call looks up every text at once and sends all misses, deduplicated, to the model in a
+    single embed_documents batch. Queries go through the same path, which is correct for
+    models like text-embedding-ada-002 that embed queries and documents alike.
+
+    Only embed_array and embed_query (questions, answers, eval contexts) use the cache by default.
+    embed_documents is what Chroma and bulk ingest call for corpus chunks; those are embedded
+    once per chunk, and caching them would evict the query vectors. Set cache_documents to
+    cache them as well.
+    """
+
+    def __init__(self, inner: Embeddings, namespace: str, cache: EmbeddingCache = None, cache_documents: bool = False):
+        self.inner = inner
+        self.namespace = namespace
+        self.cache = cache or EmbeddingCache()
+        self.cache_documents = cache_documents
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        """Embeddings of `texts` as one float32 matrix, a row per text"""
+        keys = [embedding_key(text, self.namespace) for text in texts]
+        found = self.cache.get_vectors(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            fresh = {key: np.asarray(vec, dtype=np.float32) for key, vec in zip(missing, vectors)}
+            self.cache.put_vectors(fresh)
+            found.update(fresh)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not self.cache_documents:
+            return [np.asarray(vec, dtype=np.float32).tolist() for vec in self.inner.embed_documents(texts)]
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_array([text])[0].tolist()
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await asyncio.to_thread(self.embed_query, text)
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic unit vectors derived from the text hash; counts calls, needs no API"""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _vector(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vec = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vec / np.linalg.norm(vec)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,54 @@
+import time
+from typing import Optional
+
+class LogRing:
+    """Fixed-size ring of log events numbered by a monotonically increasing sequence.
+
+    Slots are preallocated and overwritten in place; events are stored as tuples and only
+    turned into dicts when read. Sequence numbers start at 1, so `since(0)` returns everything
+    still held.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._slots: list[Optional[tuple]] = [None] * capacity
+        self.last_seq = 0
+
+    @property
+    def first_seq(self) -> int:
+        """Oldest sequence number still in the buffer (last_seq + 1 when empty)"""
+        return max(1, self.last_seq - self.capacity + 1)
+
+    def append(self, message: str, level: str = "info") -> dict:
+        self.last_seq += 1
+        event = (self.last_seq, time.time(), level, message)
+        self._slots[self.last_seq % self.capacity] = event
+        return self._to_dict(event)
+
+    @staticmethod
+    def _to_dict(event: tuple) -> dict:
+        seq, ts, level, message = event
+        return {"seq": seq, "ts": ts, "level": level, "message": message}
+
+    def since(self, seq: int = 0, limit: Optional[int] = None) -> dict:
+        """Events with a sequence number greater than `seq`, oldest first.
+
+        `truncated` is set when events after `seq` were already overwritten. A `seq` ahead of
+        the buffer (the process restarted) replays from the start and sets `reset`.
+        """
+        reset = seq > self.last_seq
+        if reset:
+            seq = 0
+        start = max(seq + 1, self.first_seq)
+        end = self.last_seq if limit is None else min(self.last_seq, start + limit - 1)
+        events = [self._to_dict(self._slots[s % self.capacity]) for s in range(start, end + 1)]
+        return {
+            "events": events,
+            "last_seq": self.last_seq,
+            "next_since": end if events else seq,
+            "truncated": start > seq + 1,
+            "reset": reset,
+        }
+
+    def latest(self) -> Optional[dict]:
+        return self._to_dict(self._slots[self.last_seq % self.capacity]) if self.last_seq else None
@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import importlib.util
+import os
+from typing import Optional
+
+import aiofiles
+import httpx
+
+from listing_parser import listing_delta, parse_listing
+
+# ---------------------------
+# Shared HTTP client
+# ---------------------------
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+}
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the process-wide keep-alive HTTP client"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            http2=HTTP2_ENABLED,
+            follow_redirects=True,
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=120),
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared HTTP client on shutdown"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+# ---------------------------
+# Conditional GET
+# ---------------------------
+class ValidatorStore:
+    """ETag / Last-Modified validators and the last body seen, keyed by URL"""
+
+    def __init__(self):
+        self._entries: dict[str, dict] = {}
+
+    def get(self, url: str) -> dict | None:
+        return self._entries.get(url)
+
+    def put(self, url: str, etag: str | None, last_modified: str | None, text: str):
+        if etag or last_modified:
+            self._entries[url] = {"etag": etag, "last_modified": last_modified, "text": text}
+        else:
+            self._entries.pop(url, None)
+
+    def clear(self):
+        self._entries.clear()
+
+validator_store = ValidatorStore()
+
+def _conditional_headers(etag: str | None, last_modified: str | None) -> dict:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+async def conditional_get(url: str, etag: str = None, last_modified: str = None) -> dict:
+    """GET `url` with the given validators; a 304 comes back with not_modified=True and no body"""
+    client = get_http_client()
+    resp = await client.get(url, headers=_conditional_headers(etag, last_modified))
+    if resp.status_code == 304:
+        return {
+            "not_modified": True,
+            "text": None,
+            "etag": resp.headers.get("ETag", etag),
+            "last_modified": resp.headers.get("Last-Modified", last_modified),
+        }
+    resp.raise_for_status()
+    return {
+        "not_modified": False,
+        "text": resp.text,
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+
+async def fetch_text(url: str) -> str:
+    """Fetch `url`, revalidating against the stored copy and serving it on a 304"""
+    cached = validator_store.get(url)
+    if cached:
+        result = await conditional_get(url, cached["etag"], cached["last_modified"])
+        if result["not_modified"]:
+            return cached["text"]
+    else:
+        result = await conditional_get(url)
+    validator_store.put(url, result["etag"], result["last_modified"], result["text"])
+    return result["text"]
+
+# ---------------------------
+# Streaming downloads
+# ---------------------------
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+class DownloadTooLargeError(Exception):
+    """Raised when a download exceeds its size cap"""
+
+async def _hash_existing(path: str, sha) -> int:
+    size = 0
+    async with aiofiles.open(path, "rb") as f:
+        while True:
+            block = await f.read(DOWNLOAD_CHUNK_SIZE)
+            if not block:
+                return size
+            sha.update(block)
+            size += len(block)
+
+async def download_file(url: str, dest_path: str, max_bytes: int = None, max_retries: int = 3) -> dict:
+    """Stream `url` to `dest_path`, resuming with a Range request after a dropped connection.
+
+    Returns {"path", "size", "sha256"}. Raises DownloadTooLargeError past `max_bytes`.
+    """
+    client = get_http_client()
+    sha = hashlib.sha256()
+    received = await _hash_existing(dest_path, sha) if os.path.exists(dest_path) else 0
+    attempt = 0
+    while True:
+        headers = {"Range": f"bytes={received}-"} if received else {}
+        try:
+            async with client.stream("GET", url, headers=headers) as resp:
+                if resp.status_code == 416 and received:
+                    # Range starts at the end of the file: the previous attempt already got everything
+                    break
+                resp.raise_for_status()
+                if received and resp.status_code != 206:
+                    # Server ignored the Range header; start over
+                    sha = hashlib.sha256()
+                    received = 0
+                length = resp.headers.get("Content-Length")
+                if max_bytes is not None and length is not None and received + int(length) > max_bytes:
+                    raise DownloadTooLargeError(f"{url} is {received + int(length)} bytes, cap is {max_bytes}")
+                async with aiofiles.open(dest_path, "ab" if received else "wb") as f:
+                    async for chunk in resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        received += len(chunk)
+                        if max_bytes is not None and received > max_bytes:
+                            raise DownloadTooLargeError(f"{url} exceeded the {max_bytes} byte cap")
+                        sha.update(chunk)
+                        await f.write(chunk)
+            break
+        except httpx.TransportError:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            await asyncio.sleep(2 ** attempt)
+            # Partial bytes already on disk are kept and hashed, so the next request resumes after them
+    return {"path": dest_path, "size": received, "sha256": sha.hexdigest()}
+
+# ---------------------------
+# Fetch + parse + compare in one step
+# ---------------------------
+async def fetch_and_diff(url: str, last_known: str = None, etag: str = None, last_modified: str = None) -> dict:
+    """Fetch a listing (conditionally), parse it and diff it against `last_known`; the page itself is never returned"""
+    fetched = await conditional_get(url, etag, last_modified)
+    result = {"not_modified": fetched["not_modified"], "etag": fetched["etag"], "last_modified": fetched["last_modified"]}
+    if fetched["not_modified"]:
+        return result
+    # Large listings take a while to parse; keep the server's event loop responsive meanwhile
+    entries = await asyncio.to_thread(parse_listing, fetched["text"])
+    result.update(listing_delta(entries, last_known))
+    return result
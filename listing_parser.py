@@ -0,0 +1,110 @@
+import html
+import os
+import re
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterator, Optional
+
+# ---------------------------
+# 3GPP FTP-over-HTTP directory listings
+# ---------------------------
+# Rows look like <tr><td>icon</td><td>..</td><td><a href="...">name</a></td><td>2024/03/28 14:05</td><td>1.2 MB</td></tr>
+LISTING_DATE_FORMAT = "%Y/%m/%d %H:%M"
+
+_TBODY_RE = re.compile(r"<tbody\b[^>]*>(.*)</tbody\s*>", re.S | re.I)
+_ROW_RE = re.compile(r"<tr\b[^>]*>(.*?)</tr\s*>", re.S | re.I)
+_CELL_RE = re.compile(r"<td\b[^>]*>(.*?)</td\s*>", re.S | re.I)
+_HREF_RE = re.compile(r"""<a\b[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.I)
+_TAG_RE = re.compile(r"<[^>]+>")
+_SIZE_RE = re.compile(r"^([\d.,]+)\s*([KMGT]?i?B?)$", re.I)
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+@dataclass
+class ListingEntry:
+    name: str
+    href: str
+    size: Optional[int]
+    timestamp: Optional[datetime]
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["timestamp"] = self.timestamp.strftime(LISTING_DATE_FORMAT) if self.timestamp else None
+        return data
+
+def parse_size(text: str) -> Optional[int]:
+    """'1.2 MB' / '345 KB' / '1234' to bytes; None for '-' or anything unrecognised"""
+    match = _SIZE_RE.match(text.strip())
+    if not match:
+        return None
+    try:
+        value = float(match.group(1).replace(",", ""))
+    except ValueError:
+        return None
+    return int(value * _SIZE_UNITS.get(match.group(2)[:1].upper(), 1))
+
+_DATE_RE = re.compile(r"^(\d{4})/(\d{2})/(\d{2}) (\d{2}):(\d{2})$")
+
+def parse_listing_date(text: str) -> Optional[datetime]:
+    """LISTING_DATE_FORMAT without strptime, which dominates parse time on large listings"""
+    match = _DATE_RE.match(text)
+    if not match:
+        return None
+    try:
+        return datetime(*map(int, match.groups()))
+    except ValueError:
+        return None
+
+def _cell_text(cell: str) -> str:
+    return html.unescape(_TAG_RE.sub("", cell)).strip()
+
+def iter_listing(page: str) -> Iterator[ListingEntry]:
+    """Yield every linked row of a listing in one pass over the page, without building a DOM"""
+    body = _TBODY_RE.search(page)
+    section = body.group(1) if body else page
+    for row in _ROW_RE.finditer(section):
+        cols = _CELL_RE.findall(row.group(1))
+        if len(cols) < 5:
+            continue
+        link = _HREF_RE.search(cols[2])
+        if not link:
+            continue
+        href = html.unescape(link.group(1) or link.group(2) or link.group(3) or "")
+        yield ListingEntry(
+            name=os.path.basename(href.rstrip("/")),
+            href=href,
+            size=parse_size(_cell_text(cols[4])),
+            timestamp=parse_listing_date(_cell_text(cols[3]))
+        )
+
+def parse_listing(page: str) -> list[ListingEntry]:
+    return list(iter_listing(page))
+
+def latest_zip(entries) -> Optional[str]:
+    """Filename of the newest dated .zip entry (first one listed wins a tie)"""
+    newest = None
+    for entry in entries:
+        if entry.timestamp is None or not entry.href.endswith(".zip"):
+            continue
+        if newest is None or entry.timestamp > newest.timestamp:
+            newest = entry
+    return newest.name if newest else None
+
+# ---------------------------
+# Listing diff
+# ---------------------------
+MAX_DELTA_ENTRIES = 20
+
+def listing_delta(entries: list[ListingEntry], last_known: Optional[str]) -> dict:
+    """Compare a parsed listing against the last known filename"""
+    latest = latest_zip(entries)
+    known = next((e for e in entries if e.name == last_known), None) if last_known else None
+    newer = [
+        e for e in entries
+        if e.href.endswith(".zip") and e.timestamp and (known is None or (known.timestamp and e.timestamp > known.timestamp))
+    ]
+    newer.sort(key=lambda e: e.timestamp, reverse=True)
+    return {
+        "latest_file": latest,
+        "decision": "new version" if (last_known or "") != (latest or "") else "same version",
+        "new_entries": [e.to_dict() for e in newer[:MAX_DELTA_ENTRIES]] if latest != last_known else [],
+    }
@@ -2,23 +2,30 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 from contextlib import asynccontextmanager
-import threading
 
 from utils import login
 from agents import monitoring_agent
-from agents.monitoring_agent import init_db, background_monitor, mcp
+from agents.monitoring_agent import init_db, background_monitor, cleanup_mcp_client
 from DocumentUpload import document_uploader
+from small_logics import warmup_rag_clients, close_rag_clients, stream_rag_answer
+from rag_streaming import build_stream_router
 from agents import ai_assistant
 from agents.ai_assistant import router as ai_assistant_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
     asyncio.create_task(background_monitor())
-    threading.Thread(target=lambda: mcp.run("stdio"), daemon=True).start()
+    # The MCP tools run in-process through the agent's client pool; no stdio server thread
+    # Requests don't wait for the RAG clients; the first one to need them builds them if warmup hasn't
+    warmup = asyncio.create_task(warmup_rag_clients())
     yield
+    warmup.cancel()
+    await cleanup_mcp_client()
+    await close_rag_clients()
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(ai_assistant_router, prefix="/api")
+app.include_router(build_stream_router(stream_rag_answer), prefix="/api")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:8081", "http://localhost:8080", "http://localhost:8080/workflows", "*"],
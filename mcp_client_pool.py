@@ -0,0 +1,293 @@
+import asyncio
+import importlib
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+
+# ---------------------------
+# Circuit breaker
+# ---------------------------
+class CircuitOpenError(Exception):
+    """Raised instead of calling the MCP server while the circuit is open"""
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and fails fast until `reset_timeout` passes.
+
+    Then one probe call is let through (half-open). A failed probe reopens the circuit with the
+    timeout doubled, up to `max_reset_timeout`; a successful one closes it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 2.0,
+        max_reset_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self._clock() - self._opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+        self._probing = False
+
+    def release(self):
+        """Give up the half-open probe without a verdict (the call was cancelled); the next call probes"""
+        if self.state == "half_open":
+            self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open":
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+            self._open()
+        elif self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = "open"
+        self._opened_at = self._clock()
+        self._probing = False
+
+# ---------------------------
+# Metrics
+# ---------------------------
+class LatencyStats:
+    """Count / average / max in milliseconds per key"""
+
+    def __init__(self):
+        self._stats: dict[tuple, dict] = {}
+
+    def record(self, key: tuple, seconds: float):
+        entry = self._stats.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        ms = seconds * 1000
+        entry["count"] += 1
+        entry["total_ms"] += ms
+        entry["max_ms"] = max(entry["max_ms"], ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "/".join(key): {
+                "count": entry["count"],
+                "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                "max_ms": round(entry["max_ms"], 3),
+            }
+            for key, entry in self._stats.items()
+        }
+
+# ---------------------------
+# Client pool
+# ---------------------------
+ClientFactory = Callable[[], Awaitable[tuple[Client, str]]]
+
+def load_local_mcp_server(module_name: str) -> Optional[FastMCP]:
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        return None
+    server = getattr(module, "mcp", None)
+    return server if isinstance(server, FastMCP) else None
+
+def local_or_remote_opener(module_name: str, remote_transport: Callable[[], Any], required_tools: set[str], mode: str = "auto") -> ClientFactory:
+    """`open_client` for McpClientPool that talks to the FastMCP server in `module_name` in-process.
+
+    "auto" uses the in-process server when the module is importable and has every tool in
+    `required_tools`, and connects through `remote_transport()` otherwise; "inprocess" and
+    "remote" force one path.
+    """
+    async def open_client() -> tuple[Client, str]:
+        if mode != "remote":
+            server = load_local_mcp_server(module_name)
+            if server is not None:
+                # Client(server) talks to the FastMCP object directly: no serialization over HTTP
+                client = Client(server)
+                try:
+                    await client.__aenter__()
+                    missing = required_tools - {tool.name for tool in await client.list_tools()}
+                    if missing:
+                        await client.__aexit__(None, None, None)
+                        raise RuntimeError(f"{module_name} lacks tools {sorted(missing)}")
+                    return client, "inprocess"
+                except Exception as e:
+                    if mode == "inprocess":
+                        raise
+                    print(f"In-process MCP server unavailable, connecting remotely: {e}")
+            elif mode == "inprocess":
+                raise RuntimeError(f"MCP server module {module_name!r} is not importable")
+        client = Client(remote_transport())
+        await client.__aenter__()
+        return client, "remote"
+    return open_client
+
+class McpClientPool:
+    """A fixed number of connected MCP clients shared by concurrent callers.
+
+    `open_client` returns an entered Client and a transport label. Calls wait for a free slot,
+    run with a timeout, and drop the slot's connection on transport errors so the next user of
+    the slot reconnects. A background task pings idle connections. While the circuit breaker
+    is open, calls raise CircuitOpenError immediately instead of waiting on a dead server.
+    """
+
+    def __init__(
+        self,
+        open_client: ClientFactory,
+        size: int = 4,
+        call_timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        ping_interval: float = 30.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self._open_client = open_client
+        self.size = size
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.ping_interval = ping_interval
+        self.breaker = breaker or CircuitBreaker()
+        self._slots: list[Optional[tuple[Client, str]]] = [None] * size
+        self._free: asyncio.Queue[int] = asyncio.Queue()
+        for idx in range(size):
+            self._free.put_nowait(idx)
+        self._pinger: Optional[asyncio.Task] = None
+        self.queue_wait = LatencyStats()
+        self.call_latency = LatencyStats()
+        self.counters = {"calls": 0, "failures": 0, "timeouts": 0, "rejected": 0, "connects": 0, "connect_failures": 0}
+        self.waiting = 0
+
+    @property
+    def transport(self) -> Optional[str]:
+        return next((slot[1] for slot in self._slots if slot), None)
+
+    async def _connect(self, idx: int) -> tuple[Client, str]:
+        slot = self._slots[idx]
+        if slot is None:
+            try:
+                slot = await asyncio.wait_for(self._open_client(), timeout=self.connect_timeout)
+            except Exception:
+                self.counters["connect_failures"] += 1
+                raise
+            self.counters["connects"] += 1
+            self._slots[idx] = slot
+        return slot
+
+    async def _drop(self, idx: int):
+        slot, self._slots[idx] = self._slots[idx], None
+        if slot is not None:
+            try:
+                await slot[0].__aexit__(None, None, None)
+            except Exception:
+                pass
+
+    async def _acquire(self) -> int:
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            return await self._free.get()
+        finally:
+            self.waiting -= 1
+            self.queue_wait.record(("queue",), time.perf_counter() - start)
+
+    async def call_tool(self, name: str, arguments: dict, timeout: Optional[float] = None):
+        if not self.breaker.allow():
+            self.counters["rejected"] += 1
+            raise CircuitOpenError(f"MCP server unavailable (circuit {self.breaker.state}), not calling {name}")
+        probe = self.breaker.state == "half_open"
+        settled = False
+        self._ensure_pinger()
+        try:
+            idx = await self._acquire()
+            try:
+                client, transport = await self._connect(idx)
+                start = time.perf_counter()
+                self.counters["calls"] += 1
+                try:
+                    result = await asyncio.wait_for(client.call_tool(name, arguments), timeout=timeout or self.call_timeout)
+                finally:
+                    self.call_latency.record((transport, name), time.perf_counter() - start)
+            except ToolError:
+                # The tool itself failed; the connection and the server are fine
+                settled = True
+                self.breaker.record_success()
+                raise
+            except asyncio.CancelledError:
+                await self._drop(idx)
+                raise
+            except Exception as e:
+                settled = True
+                self.counters["failures"] += 1
+                if isinstance(e, asyncio.TimeoutError):
+                    self.counters["timeouts"] += 1
+                self.breaker.record_failure()
+                await self._drop(idx)
+                raise
+            else:
+                settled = True
+                self.breaker.record_success()
+                return result
+            finally:
+                self._free.put_nowait(idx)
+        finally:
+            # A probe cancelled in the queue or mid-call says nothing about the server; without
+            # this the breaker would stay half-open with its only probe slot taken
+            if probe and not settled:
+                self.breaker.release()
+
+    def _ensure_pinger(self):
+        if self.ping_interval and (self._pinger is None or self._pinger.done()):
+            self._pinger = asyncio.create_task(self._ping_loop())
+
+    async def _ping_loop(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            # Only idle, connected slots are pinged; busy ones are proving themselves already
+            for _ in range(self._free.qsize()):
+                idx = self._free.get_nowait()
+                try:
+                    if self._slots[idx] is not None:
+                        await asyncio.wait_for(self._slots[idx][0].ping(), timeout=self.connect_timeout)
+                except Exception:
+                    self.breaker.record_failure()
+                    await self._drop(idx)
+                finally:
+                    self._free.put_nowait(idx)
+
+    def metrics(self) -> dict:
+        return {
+            "transport": self.transport,
+            "size": self.size,
+            "connected": sum(1 for slot in self._slots if slot),
+            "in_use": self.size - self._free.qsize(),
+            "waiting": self.waiting,
+            "circuit": self.breaker.state,
+            "counters": dict(self.counters),
+            "queue_wait": self.queue_wait.snapshot(),
+            "calls": self.call_latency.snapshot(),
+        }
+
+    async def close(self):
+        if self._pinger is not None:
+            self._pinger.cancel()
+            self._pinger = None
+        for idx in range(self.size):
+            await self._drop(idx)
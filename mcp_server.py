@@ -1,10 +1,9 @@
 import asyncio
 import os
 from fastmcp import FastMCP, Context
-import httpx
-from bs4 import BeautifulSoup
-from datetime import datetime
 from langsmith.run_helpers import traceable
+from http_fetcher import fetch_text, conditional_get, fetch_and_diff
+from listing_parser import iter_listing, latest_zip
 
 os.environ["LANGCHAIN_TRACING_V2"] = "true"
 
@@ -19,35 +18,31 @@ mcp = FastMCP("Monitoring Tools MCP Server", api_route="/mcp/", debug=True)
 @mcp.tool()
 async def fetch_url(url: str, ctx: Context) -> str:
     """Fetch the content of a URL asynchronously"""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        return resp.text
+    return await fetch_text(url)
+
+@traceable
+@mcp.tool()
+async def fetch_url_conditional(url: str, etag: str = None, last_modified: str = None, ctx: Context = None) -> dict:
+    """Fetch a URL with If-None-Match / If-Modified-Since; returns not_modified=True on a 304"""
+    return await conditional_get(url, etag, last_modified)
 
 @traceable
 @mcp.tool()
 def parse_version(html: str, ctx: Context):
     """Parse the latest .zip file in the HTML page"""
-    soup = BeautifulSoup(html, "html.parser")
-    files = []
-    for row in soup.select("tbody tr"):
-        cols = row.find_all("td")
-        if len(cols) < 5:
-            continue
-        a_tag = cols[2].find("a", href=True)
-        if not a_tag or not a_tag["href"].endswith(".zip"):
-            continue
-        filename = os.path.basename(a_tag["href"])
-        date_str = cols[3].get_text(strip=True)
-        try:
-            date_obj = datetime.strptime(date_str, "%Y/%m/%d %H:%M")
-        except Exception:
-            continue
-        files.append((filename, date_obj))
-    if not files:
-        return None
-    files.sort(key=lambda x: x[1], reverse=True)
-    return files[0][0]
+    return latest_zip(iter_listing(html))
+
+@traceable
+@mcp.tool()
+def parse_listing_entries(html: str, ctx: Context) -> list[dict]:
+    """Parse every row of a directory listing into name, href, size (bytes) and timestamp"""
+    return [entry.to_dict() for entry in iter_listing(html)]
+
+@traceable
+@mcp.tool()
+async def fetch_and_diff_listing(url: str, last_known: str = None, etag: str = None, last_modified: str = None, ctx: Context = None) -> dict:
+    """Fetch, parse and compare a listing against the last known file in one call; returns only the delta"""
+    return await fetch_and_diff(url, last_known, etag, last_modified)
 
 @traceable
 @mcp.tool()
@@ -0,0 +1,123 @@
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+# ---------------------------
+# Statements
+# ---------------------------
+# Kept as constants: sqlite3 caches the compiled statement per connection, so with long-lived
+# connections each query is prepared once
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS files (
+           id INTEGER PRIMARY KEY,
+           filename TEXT UNIQUE,
+           url TEXT,
+           status TEXT,
+           last_checked TEXT,
+           first_seen TEXT
+       )""",
+    "CREATE INDEX IF NOT EXISTS idx_files_last_checked ON files(last_checked)",
+    "CREATE INDEX IF NOT EXISTS idx_files_url_last_checked ON files(url, last_checked)",
+)
+# Created after the first_seen migration in _init_schema; older databases lack the column
+FIRST_SEEN_INDEX = "CREATE INDEX IF NOT EXISTS idx_files_url_first_seen ON files(url, first_seen)"
+
+UPSERT_FILE = """INSERT INTO files (filename, url, status, last_checked, first_seen)
+                 VALUES (?, ?, ?, ?, ?)
+                 ON CONFLICT(filename) DO UPDATE SET
+                     status=excluded.status,
+                     last_checked=excluded.last_checked"""
+LATEST_FILE = "SELECT filename, url, status, last_checked FROM files ORDER BY last_checked DESC LIMIT 1"
+LATEST_FILE_FOR_URL = "SELECT filename, url, status, last_checked FROM files WHERE url = ? ORDER BY last_checked DESC LIMIT 1"
+UPDATE_TIMES = "SELECT first_seen FROM files WHERE url = ? AND first_seen IS NOT NULL ORDER BY first_seen"
+
+def _row_to_file(row) -> dict | None:
+    return {"filename": row[0], "url": row[1], "status": row[2], "last_checked": row[3]} if row else None
+
+# ---------------------------
+# Repository
+# ---------------------------
+class MonitorRepository:
+    """Access to the monitoring `files` table.
+
+    Writes go through one dedicated thread holding one connection; reads use a small pool of
+    threads with a connection each. The database runs in WAL mode, so dashboard reads never
+    wait on crawler writes. Async methods run on those threads and never block the event loop.
+    """
+
+    def __init__(self, db_path: str, readers: int = 4):
+        self.db_path = db_path
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="monitor-db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="monitor-db-reader")
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    # --- synchronous operations (run on the DB threads) ---
+    def _init_schema(self):
+        conn = self._conn()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        # Databases created before first_seen existed
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(files)")]
+        if "first_seen" not in columns:
+            conn.execute("ALTER TABLE files ADD COLUMN first_seen TEXT")
+        conn.execute(FIRST_SEEN_INDEX)
+        conn.commit()
+
+    def _add_file(self, filename: str, url: str, status: str):
+        current_time = datetime.now().isoformat()
+        conn = self._conn()
+        conn.execute(UPSERT_FILE, (filename, url, status, current_time, current_time))
+        conn.commit()
+
+    def _latest_file(self, url: Optional[str]) -> dict | None:
+        conn = self._conn()
+        if url is None:
+            row = conn.execute(LATEST_FILE).fetchone()
+        else:
+            row = conn.execute(LATEST_FILE_FOR_URL, (url,)).fetchone()
+        return _row_to_file(row)
+
+    def _update_times(self, url: str) -> list[float]:
+        rows = self._conn().execute(UPDATE_TIMES, (url,)).fetchall()
+        return [datetime.fromisoformat(row[0]).timestamp() for row in rows]
+
+    def init_schema(self):
+        """Create tables and indexes; blocking, meant for startup"""
+        self._writer.submit(self._init_schema).result()
+
+    # --- async API ---
+    async def _on(self, executor: ThreadPoolExecutor, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    async def add_file(self, filename: str, url: str, status: str):
+        await self._on(self._writer, self._add_file, filename, url, status)
+
+    async def get_latest_file(self, url: str = None) -> dict | None:
+        return await self._on(self._readers, self._latest_file, url)
+
+    async def get_update_times(self, url: str) -> list[float]:
+        return await self._on(self._readers, self._update_times, url)
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
@@ -1,41 +1,26 @@
 import asyncio
 import os
-import sqlite3
 from datetime import datetime
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from pathlib import Path
 import json
 
 from pydantic import BaseModel
-from fastmcp import Client
 from fastmcp.client.transports import StreamableHttpTransport
 
 from .tools.notifier_tool import send_notification
+from monitor_db import MonitorRepository
+from crawler_config import ConfigService
+from mcp_client_pool import McpClientPool, local_or_remote_opener
+from ws_broadcast import Broadcaster
 from llm.llm_endpoints import chat_completion
 
 # ---------------------------
 # WebSocket Manager
 # ---------------------------
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: set[WebSocket] = set()
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.add(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
-
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections.copy():
-            try:
-                await connection.send_json(message)
-            except Exception:
-                self.disconnect(connection)
-
-manager = ConnectionManager()
+# Each dashboard gets its own bounded queue and writer task, see ws_broadcast
+manager = Broadcaster()
 router = APIRouter()
 
 # ---------------------------
@@ -58,90 +43,68 @@ def update_latest_status(msg: str):
 
 def print_and_store(msg: str):
     update_latest_status(msg)
-    try:
-        asyncio.create_task(manager.broadcast({"type": "log", "data": msg}))
-    except Exception:
-        pass
+    manager.publish({"type": "log", "data": msg})
+
+def normalize_crawler_config(data: dict) -> dict:
+    data.setdefault("crawler_active", False)
+    data.setdefault("crawler_frequency", 10)
+    return data
+
+config_service = ConfigService(CONFIG_PATH, normalize_crawler_config)
 
 def read_crawler_config():
-    if CONFIG_PATH.exists():
-        with open(CONFIG_PATH, "r") as f:
-            data = json.load(f)
-            data.setdefault("crawler_active", False)
-            data.setdefault("crawler_frequency", 10)
-            return data
-    else:
-        return {"crawler_active": False, "crawler_frequency": 10}
+    return config_service.get()
 
 def write_crawler_config(active: bool = None, frequency: int = None):
-    cfg = read_crawler_config()
-    orig_active = cfg.get("crawler_active", False)
-    if active is not None:
-        cfg["crawler_active"] = active
-    if frequency is not None:
-        cfg["crawler_frequency"] = frequency
-    CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(cfg, f)
+    def apply(cfg: dict):
+        if active is not None:
+            cfg["crawler_active"] = active
+        if frequency is not None:
+            cfg["crawler_frequency"] = frequency
+    config_service.update(apply)
 
 crawler_wakeup_event = asyncio.Event()
 
+monitor_repo = MonitorRepository(DB_PATH)
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        """CREATE TABLE IF NOT EXISTS files (
-               id INTEGER PRIMARY KEY,
-               filename TEXT UNIQUE,
-               url TEXT,
-               status TEXT,
-               last_checked TEXT
-           )"""
-    )
-    conn.commit()
-    conn.close()
-
-def add_file(filename: str, url: str, status: str):
-    current_time = datetime.now().isoformat() 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        """INSERT INTO files (filename, url, status, last_checked)
-           VALUES (?, ?, ?, ?)
-           ON CONFLICT(filename) DO UPDATE SET
-               status=excluded.status,
-               last_checked=excluded.last_checked""",
-        (filename, url, status,current_time)
-    )
-    conn.commit()
-    conn.close()
-
-def get_latest_file():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT filename, url, last_checked FROM files ORDER BY last_checked DESC LIMIT 1")
-    row = c.fetchone()
-    conn.close()
-    return {"filename": row[0], "url": row[1], "last_checked": row[2]} if row else None
+    monitor_repo.init_schema()
+
+async def add_file(filename: str, url: str, status: str):
+    await monitor_repo.add_file(filename, url, status)
+
+async def get_latest_file():
+    return await monitor_repo.get_latest_file()
 
 # ---------------------------
 # MCP Client (Connect to mcp_server.py)
 # ---------------------------
 
 MCP_SERVER_URL = "http://127.0.0.1:8001/mcp/"
-mcp_client = Client(StreamableHttpTransport(MCP_SERVER_URL))
+
+# mcp_server.py is called in-process when importable ("auto"); MCP_TRANSPORT=remote always uses MCP_SERVER_URL
+MCP_TRANSPORT_MODE = os.environ.get("MCP_TRANSPORT", "auto")
+MCP_SERVER_MODULE = os.environ.get("MCP_SERVER_MODULE", "mcp_server")
+REQUIRED_MCP_TOOLS = {"fetch_url", "parse_version", "compare_versions"}
+
+open_mcp_client = local_or_remote_opener(
+    MCP_SERVER_MODULE, lambda: StreamableHttpTransport(MCP_SERVER_URL), REQUIRED_MCP_TOOLS, MCP_TRANSPORT_MODE
+)
+
+# Connections stay open between calls instead of a new session per tool call
+mcp_pool = McpClientPool(open_mcp_client, size=2)
+
+async def cleanup_mcp_client():
+    await mcp_pool.close()
 
 async def fetch_url_mcp(url: str) -> str:
-    async with mcp_client:
-        return await mcp_client.call_tool("fetch_url", {"url": url})
+    return await mcp_pool.call_tool("fetch_url", {"url": url})
 
 async def parse_version_mcp(html: str):
-    async with mcp_client:
-        return await mcp_client.call_tool("parse_version", {"html": html})
+    return await mcp_pool.call_tool("parse_version", {"html": html})
 
 async def compare_versions_mcp(old: str, new: str):
-    async with mcp_client:
-        return await mcp_client.call_tool("compare_versions", {"old": old, "new": new})
+    return await mcp_pool.call_tool("compare_versions", {"old": old, "new": new})
 
 # ---------------------------
 # Agent Logic
@@ -154,11 +117,11 @@ async def monitor_site(BASE_URL):
         print_and_store(f"❌ No .zip files found at {BASE_URL}")
         return
 
-    last_seen = get_latest_file()
+    last_seen = await get_latest_file()
     last_filename = last_seen["filename"] if last_seen else None
     decision = await compare_versions_mcp(last_filename or "", latest_file)
     file_url = BASE_URL + latest_file
-    add_file(latest_file, file_url, decision)
+    await add_file(latest_file, file_url, decision)
     if decision == "new version":
         print_and_store(f"🚀 New file detected: {latest_file}")
         # Send notifications
@@ -170,6 +133,7 @@ async def monitor_site(BASE_URL):
 # Background monitor task
 async def background_monitor(BASE_URL):
     while True:
+        config_service.reload_if_changed()
         cfg = read_crawler_config()
         if cfg["crawler_active"]:
             await monitor_site(BASE_URL)
@@ -180,8 +144,8 @@ async def background_monitor(BASE_URL):
 # ---------------------------
 
 @router.get("/monitor/status")
-def get_status():
-    last = get_latest_file()
+async def get_status():
+    last = await get_latest_file()
     cfg = read_crawler_config()
     return {
         "filename": last["filename"] if last else None,
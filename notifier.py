@@ -0,0 +1,204 @@
+import asyncio
+import base64
+import os
+import random
+import smtplib
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from functools import lru_cache
+from typing import Optional
+
+import httpx
+
+from http_fetcher import get_http_client
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DEFAULT_FROM_EMAIL = "telecomproject4@gmail.com"
+
+# ---------------------------
+# Messages
+# ---------------------------
+@dataclass(frozen=True)
+class EncodedAttachment:
+    filename: str
+    mime_type: str
+    raw: bytes
+    b64: str
+
+@lru_cache(maxsize=16)
+def _encode_attachment(path: str, mtime: float, size: int, mime_type: str) -> EncodedAttachment:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return EncodedAttachment(os.path.basename(path), mime_type, raw, base64.b64encode(raw).decode())
+
+def load_attachment(path: str, mime_type: str = DOCX_MIME) -> EncodedAttachment:
+    """Read and base64-encode a file once; cached until the file changes"""
+    stat = os.stat(path)
+    return _encode_attachment(path, stat.st_mtime, stat.st_size, mime_type)
+
+@dataclass
+class Notification:
+    """One email going to many recipients, each of whom sees only their own address"""
+    subject: str
+    html_content: str
+    recipients: list[str]
+    attachment: Optional[EncodedAttachment] = None
+    from_email: str = DEFAULT_FROM_EMAIL
+    # Per-recipient placeholder values, e.g. {"a@x.com": {"-name-": "Alice"}}
+    substitutions: dict[str, dict] = field(default_factory=dict)
+
+    def content_for(self, recipient: str) -> str:
+        html = self.html_content
+        for key, value in self.substitutions.get(recipient, {}).items():
+            html = html.replace(key, str(value))
+        return html
+
+# ---------------------------
+# Transports
+# ---------------------------
+class RetryableSendError(Exception):
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"send failed with status {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+def _is_retryable(status: int) -> bool:
+    return status == 429 or status >= 500
+
+class SendGridTransport:
+    """SendGrid v3 mail/send over the shared async HTTP client.
+
+    Up to 1000 recipients go into one request as separate personalizations, so the attachment
+    is uploaded once per request rather than once per recipient. `api_url` can point at a
+    local HTTP stub.
+    """
+    max_recipients = 1000
+
+    def __init__(self, api_key: Optional[str] = None, api_url: Optional[str] = None):
+        self.api_key = api_key or os.environ.get("SENDGRID_API_KEY")
+        self.api_url = api_url or os.environ.get("SENDGRID_API_URL", "https://api.sendgrid.com/v3/mail/send")
+
+    def build_payload(self, note: Notification, recipients: list[str]) -> dict:
+        personalizations = []
+        for email in recipients:
+            entry = {"to": [{"email": email}]}
+            if email in note.substitutions:
+                entry["substitutions"] = note.substitutions[email]
+            personalizations.append(entry)
+        payload = {
+            "personalizations": personalizations,
+            "from": {"email": note.from_email},
+            "subject": note.subject,
+            "content": [{"type": "text/html", "value": note.html_content}],
+        }
+        if note.attachment:
+            payload["attachments"] = [{
+                "content": note.attachment.b64,
+                "filename": note.attachment.filename,
+                "type": note.attachment.mime_type,
+                "disposition": "attachment",
+            }]
+        return payload
+
+    async def send(self, note: Notification, recipients: list[str]) -> int:
+        resp = await get_http_client().post(
+            self.api_url,
+            json=self.build_payload(note, recipients),
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+        if _is_retryable(resp.status_code):
+            retry_after = resp.headers.get("Retry-After")
+            raise RetryableSendError(resp.status_code, float(retry_after) if retry_after and retry_after.isdigit() else None)
+        return resp.status_code
+
+class SmtpTransport:
+    """Plain SMTP, one message per recipient, run on worker threads (e.g. a local debugging server)"""
+    max_recipients = 1
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, username: str = None, password: str = None, starttls: bool = False):
+        self.host = host or os.environ.get("SMTP_HOST", "localhost")
+        self.port = port or int(os.environ.get("SMTP_PORT", "25"))
+        self.username = username or os.environ.get("SMTP_USERNAME")
+        self.password = password or os.environ.get("SMTP_PASSWORD")
+        self.starttls = starttls
+
+    def _send_sync(self, note: Notification, recipient: str) -> int:
+        msg = EmailMessage()
+        msg["From"] = note.from_email
+        msg["To"] = recipient
+        msg["Subject"] = note.subject
+        msg.set_content("This message requires an HTML-capable mail client.")
+        msg.add_alternative(note.content_for(recipient), subtype="html")
+        if note.attachment:
+            maintype, subtype = note.attachment.mime_type.split("/", 1)
+            msg.add_attachment(note.attachment.raw, maintype=maintype, subtype=subtype, filename=note.attachment.filename)
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+                if self.starttls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+                smtp.send_message(msg)
+        except smtplib.SMTPRecipientsRefused as e:
+            # Retrying cannot fix a refused address; report the server's code for it
+            return next(iter(e.recipients.values()), (550, b""))[0]
+        except smtplib.SMTPNotSupportedError:
+            # e.g. STARTTLS or AUTH requested from a server without it
+            return 502
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code >= 400 and e.smtp_code < 500:
+                raise RetryableSendError(e.smtp_code)
+            return e.smtp_code
+        except (OSError, smtplib.SMTPServerDisconnected):
+            raise RetryableSendError(503)
+        return 250
+
+    async def send(self, note: Notification, recipients: list[str]) -> int:
+        return await asyncio.to_thread(self._send_sync, note, recipients[0])
+
+def default_transport():
+    """NOTIFY_TRANSPORT=smtp switches from SendGrid to SMTP"""
+    if os.environ.get("NOTIFY_TRANSPORT", "sendgrid").lower() == "smtp":
+        return SmtpTransport()
+    return SendGridTransport()
+
+# ---------------------------
+# Batch sending
+# ---------------------------
+def _succeeded(status: Optional[int]) -> bool:
+    return status is not None and 200 <= status < 300
+
+async def _send_with_retry(transport, note: Notification, recipients: list[str], max_retries: int, base_delay: float) -> Optional[int]:
+    for attempt in range(max_retries + 1):
+        try:
+            return await transport.send(note, recipients)
+        except (RetryableSendError, httpx.TransportError) as e:
+            if attempt == max_retries:
+                print(f"Giving up on {len(recipients)} recipient(s) after {attempt + 1} attempts: {e}")
+                return getattr(e, "status", None)
+            delay = getattr(e, "retry_after", None) or base_delay * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+async def send_notification_batch(
+    note: Notification,
+    transport=None,
+    max_concurrency: int = 8,
+    max_retries: int = 4,
+    base_delay: float = 1.0,
+) -> dict:
+    """Send `note` to all its recipients concurrently; returns per-recipient status codes"""
+    transport = transport or default_transport()
+    recipients = list(dict.fromkeys(note.recipients))
+    step = transport.max_recipients
+    groups = [recipients[i:i + step] for i in range(0, len(recipients), step)]
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def send_group(group: list[str]):
+        async with sem:
+            return group, await _send_with_retry(transport, note, group, max_retries, base_delay)
+
+    statuses: dict[str, Optional[int]] = {}
+    for group, status in await asyncio.gather(*(send_group(g) for g in groups)):
+        statuses.update(dict.fromkeys(group, status))
+    sent = sum(1 for status in statuses.values() if _succeeded(status))
+    return {"sent": sent, "failed": len(statuses) - sent, "statuses": statuses}
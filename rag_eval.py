@@ -0,0 +1,287 @@
+import asyncio
+import concurrent.futures
+import json
+import re
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from sqlite_store import SqliteStore
+
+EVAL_SCORES_PATH = Path(__file__).with_name("eval_scores.db")
+OUT_OF_CONTEXT_MARKER = "OUT OF CONTEXT QUESTION"
+OUT_OF_CONTEXT_THRESHOLD = 0.7
+MAX_CONCURRENT_GRADES = 8
+EMBED_BATCH_SIZE = 256
+MAX_RETAINED_JOBS = 200
+
+EVAL_PROMPT = (
+    "You are an expert evaluator for AI answers to technical questions. "
+    "Given the user's question, the AI's answer, and the supporting context, "
+    "rate the answer's factual accuracy and grounding in the context on a scale from 0 to 100, "
+    "where 100 means perfectly correct and grounded in context, and 0 means completely incorrect or fabricated.\n"
+    "IMPORTANT: Do NOT use only 0, 50, or 100. Use the full range and be granular (e.g., 87, 76, 32, etc.).\n"
+    "If the question is not addressed by the context, or cannot be answered using the context, always respond with 0.\n"
+    "Question: {question}\n"
+    "Answer: {answer}\n"
+    "Context: {context}\n"
+    "Score (0-100):"
+)
+
+def context_text(context) -> str:
+    if isinstance(context, list):
+        return "\n".join([doc.page_content if hasattr(doc, "page_content") else str(doc) for doc in context])
+    return context or ""
+
+def parse_grade(content: str) -> int:
+    """First 1-3 digit number in the grader's reply, clamped to 0..100"""
+    try:
+        match = re.search(r'\b([0-9]{1,3})\b', content)
+        score = int(match.group(1)) if match else 0
+        return min(max(score, 0), 100)
+    except Exception:
+        return 0
+
+# ---------------------------
+# Vectorized scoring
+# ---------------------------
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def row_cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a[i] and b[i] for every row at once"""
+    return np.einsum("ij,ij->i", _normalize_rows(a), _normalize_rows(b))
+
+def cosine_scores(question_vecs: np.ndarray, answer_vecs: np.ndarray, context_vecs: np.ndarray) -> np.ndarray:
+    """Same formula as cosine_score in the RAG module, for many records"""
+    score = 0.7 * row_cosine(question_vecs, context_vecs) + 0.3 * row_cosine(question_vecs, answer_vecs)
+    return np.round(np.clip((score + 1) / 2 * 100, 0, 100), 2)
+
+# ---------------------------
+# Records
+# ---------------------------
+def load_eval_records(path: str) -> list[dict]:
+    """JSONL with question, answer and context (a string or a list of passages) per line"""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                records.append({
+                    "question": row["question"],
+                    "answer": row.get("answer") or "",
+                    "context": context_text(row.get("context")),
+                })
+    return records
+
+# ---------------------------
+# Persistence
+# ---------------------------
+class EvalStore(SqliteStore):
+    """Batch evaluation runs and their per-record scores"""
+
+    schema = (
+        """CREATE TABLE IF NOT EXISTS eval_runs (
+            run_id TEXT PRIMARY KEY,
+            source TEXT,
+            created TEXT,
+            records INTEGER,
+            mean_score REAL
+        )""",
+        """CREATE TABLE IF NOT EXISTS eval_scores (
+            run_id TEXT,
+            idx INTEGER,
+            question TEXT,
+            score REAL,
+            method TEXT,
+            PRIMARY KEY (run_id, idx)
+        )""",
+    )
+
+    def __init__(self, path: str | Path = EVAL_SCORES_PATH):
+        super().__init__(path)
+
+    def save_run(self, run_id: str, source: str, records: list[dict], scores: list[tuple[float, str]]):
+        mean = float(np.mean([score for score, _ in scores])) if scores else None
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO eval_runs (run_id, source, created, records, mean_score) VALUES (?, ?, ?, ?, ?)",
+                (run_id, source, datetime.now().isoformat(), len(records), mean)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO eval_scores (run_id, idx, question, score, method) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, i, rec["question"], score, method) for i, (rec, (score, method)) in enumerate(zip(records, scores))]
+            )
+            conn.commit()
+
+    def run_scores(self, run_id: str) -> list[dict]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT idx, question, score, method FROM eval_scores WHERE run_id = ? ORDER BY idx", (run_id,)
+            ).fetchall()
+        return [{"idx": r[0], "question": r[1], "score": r[2], "method": r[3]} for r in rows]
+
+# ---------------------------
+# Batch evaluator
+# ---------------------------
+class BatchEvaluator:
+    """Scores many (question, answer, context) records like evaluate_retrieval_accuracy.
+
+    All texts are embedded in batches and similarities computed as matrix operations; only
+    records that pass the out-of-context checks are sent to the LLM grader, at most
+    `max_concurrency` at a time.
+    """
+
+    def __init__(self, embeddings, llm, store: Optional[EvalStore] = None, max_concurrency: int = MAX_CONCURRENT_GRADES,
+                 threshold: float = OUT_OF_CONTEXT_THRESHOLD, embed_batch_size: int = EMBED_BATCH_SIZE):
+        self.embeddings = embeddings
+        self.llm = llm
+        self.store = store or EvalStore()
+        self.max_concurrency = max_concurrency
+        self.threshold = threshold
+        self.embed_batch_size = embed_batch_size
+
+    async def _embed(self, texts: list[str]) -> np.ndarray:
+        parts = []
+        for i in range(0, len(texts), self.embed_batch_size):
+            batch = texts[i:i + self.embed_batch_size]
+            if hasattr(self.embeddings, "embed_array"):
+                parts.append(await asyncio.to_thread(self.embeddings.embed_array, batch))
+            else:
+                parts.append(np.asarray(await asyncio.to_thread(self.embeddings.embed_documents, batch), dtype=np.float32))
+        return np.vstack(parts)
+
+    async def _grade(self, record: dict, sem: asyncio.Semaphore) -> int:
+        messages = [{"role": "system", "content": EVAL_PROMPT.format(**record)}]
+        async with sem:
+            resp = await self.llm.ainvoke(messages)
+        return parse_grade(resp.content)
+
+    async def score(self, records: list[dict]) -> list[tuple[float, str]]:
+        """(score, method) per record; method is marker, off_topic, llm or cosine"""
+        if not records:
+            return []
+        n = len(records)
+        vecs = await self._embed(
+            [r["question"] for r in records] + [r["answer"] for r in records] + [r["context"] for r in records]
+        )
+        question_vecs, answer_vecs, context_vecs = vecs[:n], vecs[n:2 * n], vecs[2 * n:]
+        off_topic = row_cosine(question_vecs, context_vecs) < self.threshold
+        fallback = cosine_scores(question_vecs, answer_vecs, context_vecs)
+
+        results: list[Optional[tuple[float, str]]] = [None] * n
+        to_grade = []
+        for i, record in enumerate(records):
+            if OUT_OF_CONTEXT_MARKER in record["answer"].upper():
+                results[i] = (0, "marker")
+            elif off_topic[i]:
+                results[i] = (0, "off_topic")
+            else:
+                to_grade.append(i)
+        sem = asyncio.Semaphore(self.max_concurrency)
+        grades = await asyncio.gather(*(self._grade(records[i], sem) for i in to_grade), return_exceptions=True)
+        for i, grade in zip(to_grade, grades):
+            # Coarse or failed grades fall back to the embedding score, as in the single-record path
+            if isinstance(grade, Exception) or grade in (0, 50, 100):
+                results[i] = (float(fallback[i]), "cosine")
+            else:
+                results[i] = (grade, "llm")
+        return results
+
+    async def run(self, records: list[dict], source: str = "inline", run_id: Optional[str] = None) -> dict:
+        run_id = run_id or uuid.uuid4().hex
+        scores = await self.score(records)
+        await asyncio.to_thread(self.store.save_run, run_id, source, records, scores)
+        methods: dict[str, int] = {}
+        for _, method in scores:
+            methods[method] = methods.get(method, 0) + 1
+        return {
+            "run_id": run_id,
+            "records": len(records),
+            "mean_score": round(float(np.mean([s for s, _ in scores])), 2) if scores else None,
+            "methods": methods,
+        }
+
+# ---------------------------
+# Background jobs
+# ---------------------------
+class EvalJobs:
+    """Batch evaluations running as asyncio tasks, off any request path.
+
+    submit() works on the event loop and from other threads (sync FastAPI routes run in the
+    threadpool): off the loop, jobs go to the loop given to bind(), or to a private background
+    loop when none was bound. Finished jobs beyond the newest `max_jobs` are forgotten.
+    """
+
+    def __init__(self, evaluator_factory, max_jobs: int = MAX_RETAINED_JOBS):
+        self._evaluator_factory = evaluator_factory
+        self.max_jobs = max_jobs
+        self.jobs: dict[str, dict] = {}
+        self._tasks: dict[str, asyncio.Future | concurrent.futures.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Run jobs submitted from other threads on `loop` (the app's loop)"""
+        self._loop = loop
+
+    def _job_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="eval-jobs", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] in ("done", "failed")]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_jobs)]:
+            del self.jobs[job_id]
+
+    def submit(self, records: Iterable[dict] = None, path: str = None) -> str:
+        """Start scoring `records` or the JSONL at `path`; returns the job (and run) id"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self.jobs[job_id] = {"status": "queued", "source": path or "inline", "result": None, "error": None}
+            self._prune()
+        coro = self._run(job_id, list(records) if records is not None else None, path)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and self._loop in (None, running):
+            task = running.create_task(coro)
+        else:
+            task = asyncio.run_coroutine_threadsafe(coro, self._job_loop())
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._finished(job_id))
+        if task.done():
+            self._finished(job_id)
+        return job_id
+
+    def _finished(self, job_id: str):
+        with self._lock:
+            self._tasks.pop(job_id, None)
+            self._prune()
+
+    async def _run(self, job_id: str, records: Optional[list[dict]], path: Optional[str]):
+        job = self.jobs[job_id]
+        job["status"] = "running"
+        try:
+            if records is None:
+                records = await asyncio.to_thread(load_eval_records, path)
+            else:
+                records = [{**r, "answer": r.get("answer") or "", "context": context_text(r.get("context"))} for r in records]
+            job["result"] = await self._evaluator_factory().run(records, source=job["source"], run_id=job_id)
+            job["status"] = "done"
+        except Exception as e:
+            job["status"], job["error"] = "failed", str(e)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        return self.jobs.get(job_id)
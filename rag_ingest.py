@@ -0,0 +1,210 @@
+import hashlib
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from sqlite_store import SqliteStore
+
+INGEST_BATCH_SIZE = 128
+INGEST_WORKERS = 4
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# ---------------------------
+# Streaming chunker
+# ---------------------------
+def iter_text_blocks(text: str, block_size: int = 64_000) -> Iterator[str]:
+    """Contiguous slices of `text`, cut at a newline where possible"""
+    start = 0
+    while start < len(text):
+        end = min(start + block_size, len(text))
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline + 1
+        yield text[start:end]
+        start = end
+
+def iter_text_chunks(blocks: Iterable[str] | str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP, window_chunks: int = 32) -> Iterator[str]:
+    """Split text arriving as contiguous blocks (file lines, iter_text_blocks) into chunks.
+
+    Only about `window_chunks` chunks of text are held at a time. The last chunk of each window
+    is carried over and re-split with the text that follows, so chunks never end at a block
+    boundary. The output is deterministic for the same text, which resuming relies on.
+    """
+    if isinstance(blocks, str):
+        blocks = iter_text_blocks(blocks)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    window = chunk_size * window_chunks
+    buffer = ""
+    for block in blocks:
+        buffer += block
+        if len(buffer) < window:
+            continue
+        chunks = splitter.split_text(buffer)
+        if len(chunks) > 1:
+            yield from chunks[:-1]
+            tail = chunks[-1]
+            pos = buffer.rfind(tail)
+            buffer = buffer[pos:] if pos >= 0 else tail
+    if buffer.strip():
+        yield from splitter.split_text(buffer)
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+# ---------------------------
+# Checkpoints
+# ---------------------------
+class IngestCheckpoints(SqliteStore):
+    """Per (standard_name, standard_version) ingest progress, in SQLite next to the vector store"""
+
+    schema = (
+        """CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+            standard_name TEXT,
+            standard_version TEXT,
+            next_chunk INTEGER,
+            status TEXT,
+            started TEXT,
+            updated TEXT,
+            PRIMARY KEY (standard_name, standard_version)
+        )""",
+    )
+
+    def get(self, standard_name: str, standard_version: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT next_chunk, status, started, updated FROM ingest_checkpoints WHERE standard_name = ? AND standard_version = ?",
+                (standard_name, standard_version)
+            ).fetchone()
+        return {"next_chunk": row[0], "status": row[1], "started": row[2], "updated": row[3]} if row else None
+
+    def save(self, standard_name: str, standard_version: str, next_chunk: int, status: str):
+        now = datetime.now().isoformat()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                """INSERT INTO ingest_checkpoints (standard_name, standard_version, next_chunk, status, started, updated)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(standard_name, standard_version) DO UPDATE SET
+                       next_chunk=excluded.next_chunk, status=excluded.status, updated=excluded.updated""",
+                (standard_name, standard_version, next_chunk, status, now, now)
+            )
+            conn.commit()
+
+# ---------------------------
+# Pipeline
+# ---------------------------
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def as_vector(vector) -> list[float]:
+    """Chroma returns stored embeddings as ndarrays and rejects a batch mixing them with lists"""
+    return np.asarray(vector, dtype=np.float32).tolist()
+
+def existing_vectors(collection, hashes: list[str], max_rounds: int = 4) -> dict[str, list[float]]:
+    """Stored vectors for any chunk already in `collection` with one of these content hashes.
+
+    The same text is usually stored once per version, so each lookup asks only for the hashes
+    still unresolved and fetches at most that many rows; a few rounds resolve any hash that
+    was crowded out by copies of another.
+    """
+    remaining = set(hashes)
+    vectors = {}
+    for _ in range(max_rounds):
+        if not remaining:
+            break
+        found = collection.get(
+            where={"chunk_hash": {"$in": sorted(remaining)}}, include=["embeddings", "metadatas"], limit=len(remaining)
+        )
+        if not found["ids"]:
+            break
+        for meta, vector in zip(found["metadatas"], found["embeddings"]):
+            if meta["chunk_hash"] in remaining:
+                vectors[meta["chunk_hash"]] = as_vector(vector)
+                remaining.discard(meta["chunk_hash"])
+    return vectors
+
+def chunk_doc_id(standard_name: str, standard_version: str, chunk_id: int) -> str:
+    """Stable ids make re-writing a batch after a crash an upsert, not a duplicate"""
+    return f"{standard_name}:{standard_version}:{chunk_id}"
+
+def bulk_ingest(
+    chunks: Iterable[str],
+    metadata: dict,
+    collection,
+    embeddings,
+    checkpoints: IngestCheckpoints,
+    batch_size: int = INGEST_BATCH_SIZE,
+    workers: int = INGEST_WORKERS,
+    on_progress: Callable[[str], None] = print,
+) -> dict:
+    """Embed and write `chunks` in batches, resuming from the last checkpoint.
+
+    Up to `workers` batches are embedded at once; batches are written to the Chroma
+    `collection` in order, and the checkpoint moves forward after each write, so a crash
+    loses at most the batches in flight. Every chunk is stored with its content hash, and a
+    chunk whose hash is already in the collection (typically unchanged text from the previous
+    version) reuses the stored vector instead of being embedded again.
+    """
+    standard_name = metadata.get("standard_name")
+    standard_version = metadata.get("standard_version")
+    checkpoint = checkpoints.get(standard_name, standard_version)
+    if checkpoint and checkpoint["status"] == "complete":
+        return {"status": "skipped", "chunks": checkpoint["next_chunk"], "written": 0, "reused": 0, "seconds": 0.0, "chunks_per_sec": 0.0}
+    start_chunk = checkpoint["next_chunk"] if checkpoint else 0
+    if start_chunk:
+        on_progress(f"Resuming {standard_name} {standard_version} at chunk {start_chunk}")
+    checkpoints.save(standard_name, standard_version, start_chunk, "in_progress")
+
+    def embed(batch: list[tuple[int, str]]):
+        hashes = [chunk_hash(text) for _, text in batch]
+        vectors = existing_vectors(collection, hashes)
+        missing = {h: text for h, (_, text) in zip(hashes, batch) if h not in vectors}
+        if missing:
+            vectors.update(zip(missing, map(as_vector, embeddings.embed_documents(list(missing.values())))))
+        return batch, hashes, [vectors[h] for h in hashes], len(batch) - len(missing)
+
+    def write(batch: list[tuple[int, str]], hashes: list[str], vectors):
+        collection.upsert(
+            ids=[chunk_doc_id(standard_name, standard_version, idx) for idx, _ in batch],
+            embeddings=vectors,
+            documents=[text for _, text in batch],
+            metadatas=[{**metadata, "chunk_id": idx, "chunk_hash": h} for (idx, _), h in zip(batch, hashes)],
+        )
+
+    started = time.perf_counter()
+    written = 0
+    reused = 0
+    next_chunk = start_chunk
+    in_flight = deque()
+
+    def write_oldest():
+        nonlocal written, reused, next_chunk
+        batch, hashes, vectors, batch_reused = in_flight.popleft().result()
+        write(batch, hashes, vectors)
+        written += len(batch)
+        reused += batch_reused
+        next_chunk = batch[-1][0] + 1
+        checkpoints.save(standard_name, standard_version, next_chunk, "in_progress")
+        on_progress(f"{standard_name} {standard_version}: {next_chunk} chunks, {written / (time.perf_counter() - started):.1f} chunks/s")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-embed") as pool:
+        for batch in batched(islice(enumerate(chunks), start_chunk, None), batch_size):
+            in_flight.append(pool.submit(embed, batch))
+            if len(in_flight) >= workers:
+                write_oldest()
+        while in_flight:
+            write_oldest()
+    checkpoints.save(standard_name, standard_version, next_chunk, "complete")
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed else 0.0
+    return {"status": "complete", "chunks": next_chunk, "written": written, "reused": reused, "seconds": round(elapsed, 2), "chunks_per_sec": round(rate, 1)}
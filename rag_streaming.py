@@ -0,0 +1,87 @@
+import asyncio
+import contextlib
+import json
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+# stream_answer(question, where=...) yields {"type": "sources" | "token" | "done", "data": ...}
+StreamAnswer = Callable[..., AsyncIterator[dict]]
+
+def sse_event(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+async def sse_stream(request: Request, events: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """Format `events` as SSE, stopping (and closing the answer stream) once the client is gone"""
+    try:
+        async for event in events:
+            if await request.is_disconnected():
+                break
+            yield sse_event(event)
+    except Exception as e:
+        yield sse_event({"type": "error", "data": str(e)})
+    finally:
+        await events.aclose()
+
+async def _send_answer(websocket: WebSocket, events: AsyncIterator[dict]):
+    try:
+        async for event in events:
+            await websocket.send_json(event)
+    except (WebSocketDisconnect, asyncio.CancelledError):
+        raise
+    except Exception as e:
+        await websocket.send_json({"type": "error", "data": str(e)})
+    finally:
+        await events.aclose()
+
+def build_stream_router(stream_answer: StreamAnswer, prefix: str = "/ai-assistant") -> APIRouter:
+    """Streaming endpoints for the AI assistant app:
+
+    GET  {prefix}/stream?question=...&standard_name=...&standard_version=...   (Server-Sent Events)
+    WS   {prefix}/ws   send {"question": ..., "where": {...}}; {"type": "cancel"} stops the answer
+    """
+    router = APIRouter(prefix=prefix)
+
+    @router.get("/stream")
+    async def stream_answer_sse(request: Request, question: str, standard_name: Optional[str] = None, standard_version: Optional[str] = None):
+        where = {key: value for key, value in (("standard_name", standard_name), ("standard_version", standard_version)) if value}
+        if len(where) > 1:
+            where = {"$and": [{key: value} for key, value in where.items()]}
+        events = stream_answer(question, where=where or None)
+        return StreamingResponse(
+            sse_stream(request, events),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @router.websocket("/ws")
+    async def stream_answer_ws(websocket: WebSocket):
+        await websocket.accept()
+        current: Optional[asyncio.Task] = None
+        try:
+            while True:
+                try:
+                    message = json.loads(await websocket.receive_text())
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    # A bad message gets an error event; the socket and any answer in progress carry on
+                    await websocket.send_json({"type": "error", "data": "expected a JSON object"})
+                    continue
+                if current is not None and not current.done():
+                    # A new question or an explicit cancel stops the answer in progress
+                    current.cancel()
+                    with contextlib.suppress(asyncio.CancelledError, Exception):
+                        await current
+                    await websocket.send_json({"type": "cancelled", "data": None})
+                if message.get("type") == "cancel" or not message.get("question"):
+                    continue
+                current = asyncio.create_task(_send_answer(websocket, stream_answer(message["question"], where=message.get("where"))))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if current is not None and not current.done():
+                current.cancel()
+
+    return router
@@ -0,0 +1,359 @@
+import asyncio
+import os
+import threading
+from typing import AsyncIterator
+import httpx
+from sklearn.metrics.pairwise import cosine_similarity
+from dotenv import load_dotenv
+from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain.chains.retrieval import create_retrieval_chain
+from langchain_core.prompts import ChatPromptTemplate
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+from rag_eval import EVAL_PROMPT, BatchEvaluator, EvalJobs, EvalStore, parse_grade
+from rag_ingest import INGEST_BATCH_SIZE, INGEST_WORKERS, IngestCheckpoints, bulk_ingest, iter_text_chunks
+from vector_index import MmapRetriever, MmapVectorIndex
+
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_API_VERSION = os.getenv("OPENAI_VERSION")
+OPENAI_DEPLOYMENT = os.getenv("OPENAI_DEPLOYMENT")
+OPENAI_DEPLOYMENT_ENDPOINT = os.getenv("OPENAI_BASE")
+
+PATH_TO_VECTORSTORE = r"C:\Users\342534\Desktop\Telecom Standards Management\backend\vectorstores"
+PATH_TO_VECTOR_INDEX = r"C:\Users\342534\Desktop\Telecom Standards Management\backend\vector_index"
+
+# "chroma" or "mmap" (vector_index.MmapVectorIndex, built with export_vector_index)
+RETRIEVER_BACKEND = os.getenv("RAG_RETRIEVER_BACKEND", "chroma")
+
+COLLECTION_NAME = "standards_collection"
+EMBEDDING_DEPLOYMENT = "text-embedding-ada-002"
+
+# ---------------------------
+# Shared clients
+# ---------------------------
+class RagClients:
+    """Process-wide embedding client, chat models and Chroma stores, created once and reused.
+
+    All Azure OpenAI clients share one pair of httpx clients, so their keep-alive connections
+    are pooled. Call warmup() at startup and aclose() on shutdown.
+    """
+
+    def __init__(self, base_embeddings: Embeddings = None, embedding_cache: EmbeddingCache = None):
+        self._lock = threading.Lock()
+        # A stand-in model (e.g. embedding_cache.FakeEmbeddings) for running without Azure
+        self._base_embeddings = base_embeddings
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        self._http_client = None
+        self._http_async_client = None
+        self._embeddings = None
+        self._llms: dict[float, AzureChatOpenAI] = {}
+        self._stores: dict[str, Chroma] = {}
+        self._checkpoints: dict[str, IngestCheckpoints] = {}
+        self._indexes: dict[str, MmapVectorIndex] = {}
+
+    def _http_clients(self):
+        if self._http_client is None:
+            limits = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=120)
+            timeout = httpx.Timeout(60.0, connect=10.0)
+            self._http_client = httpx.Client(limits=limits, timeout=timeout)
+            self._http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        return self._http_client, self._http_async_client
+
+    def embeddings(self) -> CachedEmbeddings:
+        with self._lock:
+            if self._embeddings is None:
+                base = self._base_embeddings
+                if base is None:
+                    http_client, http_async_client = self._http_clients()
+                    base = AzureOpenAIEmbeddings(
+                        api_key=OPENAI_API_KEY,
+                        api_version=OPENAI_API_VERSION,
+                        azure_deployment=EMBEDDING_DEPLOYMENT,
+                        azure_endpoint=OPENAI_DEPLOYMENT_ENDPOINT,
+                        http_client=http_client,
+                        http_async_client=http_async_client,
+                    )
+                # Repeated questions and contexts are served from disk instead of the API
+                self._embeddings = CachedEmbeddings(base, namespace=EMBEDDING_DEPLOYMENT, cache=self.embedding_cache)
+            return self._embeddings
+
+    def llm(self, temperature: float = 0) -> AzureChatOpenAI:
+        with self._lock:
+            if temperature not in self._llms:
+                http_client, http_async_client = self._http_clients()
+                self._llms[temperature] = AzureChatOpenAI(
+                    api_key=OPENAI_API_KEY,
+                    api_version=OPENAI_API_VERSION,
+                    azure_deployment=OPENAI_DEPLOYMENT,
+                    azure_endpoint=OPENAI_DEPLOYMENT_ENDPOINT,
+                    temperature=temperature,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                )
+            return self._llms[temperature]
+
+    def vectorstore(self, persist_dir: str = PATH_TO_VECTORSTORE) -> Chroma:
+        emb = self.embeddings()
+        with self._lock:
+            if persist_dir not in self._stores:
+                self._stores[persist_dir] = Chroma(
+                    collection_name=COLLECTION_NAME,
+                    embedding_function=emb,
+                    persist_directory=persist_dir,
+                )
+            return self._stores[persist_dir]
+
+    def vector_index(self, index_dir: str = PATH_TO_VECTOR_INDEX) -> MmapVectorIndex:
+        with self._lock:
+            if index_dir not in self._indexes:
+                self._indexes[index_dir] = MmapVectorIndex.open(index_dir)
+            return self._indexes[index_dir]
+
+    def checkpoints(self, persist_dir: str = PATH_TO_VECTORSTORE) -> IngestCheckpoints:
+        with self._lock:
+            if persist_dir not in self._checkpoints:
+                self._checkpoints[persist_dir] = IngestCheckpoints(os.path.join(persist_dir, "ingest_checkpoints.db"))
+            return self._checkpoints[persist_dir]
+
+    def warmup(self, persist_dir: str = PATH_TO_VECTORSTORE):
+        """Create every client and open the connection pool before the first request"""
+        self.llm(0)
+        self.llm(0.2)
+        self.vectorstore(persist_dir).get(limit=1)
+        # Through the model itself, so the warmup text never lands in the embedding cache
+        self.embeddings().inner.embed_query("warmup")
+
+    async def aclose(self):
+        with self._lock:
+            http_client, http_async_client = self._http_client, self._http_async_client
+            self._http_client = self._http_async_client = None
+            self._embeddings = None
+            self._llms.clear()
+            self._stores.clear()
+            self._indexes.clear()
+            checkpoints = list(self._checkpoints.values())
+            self._checkpoints.clear()
+        for store in checkpoints:
+            store.close()
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            await http_async_client.aclose()
+
+rag_clients = RagClients()
+
+async def warmup_rag_clients(persist_dir: str = PATH_TO_VECTORSTORE):
+    """For the app lifespan: build the clients off the event loop. A failure (e.g. Azure not
+    reachable) is logged rather than raised, so the app still starts and retries on first use."""
+    # Batch evaluations started from sync routes run on the app's loop
+    eval_jobs.bind(asyncio.get_running_loop())
+    try:
+        await asyncio.to_thread(rag_clients.warmup, persist_dir)
+    except Exception as e:
+        print(f"RAG client warmup failed: {e}")
+
+async def close_rag_clients():
+    await rag_clients.aclose()
+
+class _SharedEmbeddings:
+    """Resolves every use through rag_clients.embeddings(), so it never holds a closed client"""
+
+    def __getattr__(self, name):
+        return getattr(rag_clients.embeddings(), name)
+
+# Kept for callers that import the embedding client directly
+embeddings = _SharedEmbeddings()
+
+def cosine_score(question, answer, context):
+    question_vec, answer_vec, context_vec = rag_clients.embeddings().embed_array([question, answer, context])
+    context_sim = cosine_similarity([question_vec], [context_vec])[0][0]
+    answer_sim = cosine_similarity([question_vec], [answer_vec])[0][0]
+    score = (0.7 * context_sim + 0.3 * answer_sim)
+    score = (score + 1) / 2 * 100  # Normalize -1..1 to 0..100
+    return round(min(max(score, 0), 100), 2)
+
+def already_ingested(standard_name, standard_version, persist_dir):
+    checkpoint = rag_clients.checkpoints(persist_dir).get(standard_name, standard_version)
+    if checkpoint is not None:
+        # An interrupted ingest has a checkpoint that is not complete yet
+        return checkpoint["status"] == "complete"
+    # Ingested before checkpoints existed
+    vectordb = rag_clients.vectorstore(persist_dir)
+    results = vectordb.get(
+        where={
+            "$and": [
+                {"standard_name": standard_name},
+                {"standard_version": standard_version}
+            ]
+        },
+        limit=1
+    )
+    return len(results['ids']) > 0
+
+def ingest_text(raw_text, metadata: dict = None, persist_dir: str = PATH_TO_VECTORSTORE,
+                batch_size: int = INGEST_BATCH_SIZE, workers: int = INGEST_WORKERS):
+    """Chunk, embed and store a spec; `raw_text` may be a string or an iterable of text blocks (e.g. an open file).
+
+    Interrupted ingests resume from their last checkpoint.
+    """
+    standard_name = metadata.get("standard_name")
+    standard_version = metadata.get("standard_version")
+    if already_ingested(standard_name, standard_version, persist_dir):
+        print(f"❌ Standard '{standard_name}' version '{standard_version}' already ingested. Skipping.")
+        return
+    stats = bulk_ingest(
+        iter_text_chunks(raw_text, chunk_size=1000, chunk_overlap=200),
+        metadata,
+        rag_clients.vectorstore(persist_dir)._collection,
+        rag_clients.embeddings(),
+        rag_clients.checkpoints(persist_dir),
+        batch_size=batch_size,
+        workers=workers,
+    )
+    print(f"✅ Ingested {stats['written']} chunks into ChromaDB ({stats['reused']} unchanged, {stats['chunks_per_sec']} chunks/s)")
+    return stats
+
+def ingest_file(path: str, metadata: dict = None, persist_dir: str = PATH_TO_VECTORSTORE, **kwargs):
+    """ingest_text for a text file too big to read into memory"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return ingest_text(f, metadata, persist_dir, **kwargs)
+
+
+RAG_SYSTEM_PROMPT = (
+    "You are a helpful AI assistant specialized in telecom standards (3GPP and related). "
+    "When the user asks about telecom or standards, use the provided context to answer. "
+    "If the answer is not in the context or not related to telecom, respond ONLY with **OUT OF CONTEXT QUESTION** (in bold and uppercase). After that, add a short prompt like: 'Would you like to know anything about telecom standards?' "
+    "If the question is general chit-chat or not related to telecom, answer naturally using your own knowledge.\n\n"
+    "Context: {context}")
+
+def rag_prompt() -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        ("system", RAG_SYSTEM_PROMPT),
+        ("human", "{input}"),
+    ])
+
+def build_rag_chain(persist_dir: str = PATH_TO_VECTORSTORE):
+    llm = rag_clients.llm(0)
+
+    vectordb = rag_clients.vectorstore(persist_dir)
+    retriever = vectordb.as_retriever(search_kwargs={"k": 3})
+
+    combine_docs_chain = create_stuff_documents_chain(llm, rag_prompt())
+    return create_retrieval_chain(retriever, combine_docs_chain)
+
+def build_retriever(persist_dir: str = PATH_TO_VECTORSTORE, backend: str = None, index_dir: str = PATH_TO_VECTOR_INDEX,
+                    k: int = 3, where: dict = None):
+    """Top-k retriever from Chroma or the memory-mapped index, optionally limited to one standard/version"""
+    if (backend or RETRIEVER_BACKEND) == "mmap":
+        return MmapRetriever(index=rag_clients.vector_index(index_dir), embeddings=rag_clients.embeddings(), k=k, where=where)
+    search_kwargs = {"k": k}
+    if where:
+        search_kwargs["filter"] = where
+    return rag_clients.vectorstore(persist_dir).as_retriever(search_kwargs=search_kwargs)
+
+def export_vector_index(persist_dir: str = PATH_TO_VECTORSTORE, index_dir: str = PATH_TO_VECTOR_INDEX,
+                        dtype: str = "float32", ivf_lists: int = 0) -> MmapVectorIndex:
+    """(Re)build the memory-mapped index from the Chroma collection; run after ingesting.
+
+    The rebuild goes into a new version directory and replaces the shared instance; retrievers
+    built earlier keep searching the previous version's files until they are rebuilt.
+    """
+    index = MmapVectorIndex.from_chroma(rag_clients.vectorstore(persist_dir)._collection, index_dir, dtype=dtype, ivf_lists=ivf_lists)
+    with rag_clients._lock:
+        rag_clients._indexes[index_dir] = index
+    return index
+
+# --- This is the only NEW function you need for your FastAPI router! ---
+def build_rag_chain_and_retriever(persist_dir: str = PATH_TO_VECTORSTORE, backend: str = None, index_dir: str = PATH_TO_VECTOR_INDEX):
+    """
+    Returns (rag_chain, retriever) tuple for use in FastAPI and elsewhere.
+    `backend` ("chroma" or "mmap") defaults to RETRIEVER_BACKEND.
+    """
+    llm = rag_clients.llm(0)
+
+    retriever = build_retriever(persist_dir, backend, index_dir)
+
+    combine_docs_chain = create_stuff_documents_chain(llm, rag_prompt())
+    rag_chain = create_retrieval_chain(retriever, combine_docs_chain)
+    return rag_chain, retriever
+
+def is_out_of_context(question, context, threshold=0.7):
+    if isinstance(context, list):
+        context = "\n".join([doc.page_content if hasattr(doc, "page_content") else str(doc) for doc in context])
+    vecs = rag_clients.embeddings().embed_array([question, context])
+    sim = cosine_similarity(vecs[:1], vecs[1:])[0][0]
+    return sim < threshold
+
+def evaluate_retrieval_accuracy(question, answer, context, llm=None):
+    # 1. If the answer is OUT OF CONTEXT, return 0
+    if isinstance(answer, str) and "OUT OF CONTEXT QUESTION" in answer.upper():
+        print(0)
+        return 0
+
+    if isinstance(context, list):
+        context = "\n".join([doc.page_content if hasattr(doc, "page_content") else str(doc) for doc in context])
+    # Embed everything the checks below may need in one batched call; they then hit the cache
+    rag_clients.embeddings().embed_array([question, answer, context])
+
+    # 2. Out-of-context detection based on embeddings
+    if is_out_of_context(question, context, threshold=0.7):
+        print(0)
+        return 0
+
+    # ... rest of your LLM grading logic ...
+    if llm is None:
+        llm = rag_clients.llm(0.2)
+
+    messages = [
+        {"role": "system", "content": EVAL_PROMPT.format(question=question, answer=answer, context=context)}
+    ]
+    resp = llm.invoke(messages)
+    score = parse_grade(resp.content)
+
+    # Fallback for coarse scores
+    if score in (0, 50, 100):
+        score = cosine_score(question, answer, context)
+
+    return score
+
+# ---------------------------
+# Streaming answers
+# ---------------------------
+async def stream_rag_answer(question: str, persist_dir: str = PATH_TO_VECTORSTORE, backend: str = None,
+                            index_dir: str = PATH_TO_VECTOR_INDEX, where: dict = None) -> AsyncIterator[dict]:
+    """Answer `question` as events: one "sources" event as soon as retrieval is done, then a
+    "token" event per streamed chunk, then "done" with the full answer.
+
+    Closing the generator (e.g. the client disconnected) stops the LLM stream.
+    """
+    retriever = build_retriever(persist_dir, backend, index_dir, where=where)
+    docs = await retriever.ainvoke(question)
+    yield {
+        "type": "sources",
+        "data": [{"content": doc.page_content, "metadata": doc.metadata} for doc in docs],
+    }
+    # Same context layout as create_stuff_documents_chain
+    messages = rag_prompt().format_messages(context="\n\n".join(doc.page_content for doc in docs), input=question)
+    answer = []
+    async for chunk in rag_clients.llm(0).astream(messages):
+        if chunk.content:
+            answer.append(chunk.content)
+            yield {"type": "token", "data": chunk.content}
+    yield {"type": "done", "data": "".join(answer)}
+
+# ---------------------------
+# Batch evaluation
+# ---------------------------
+# Every job writes through one store (and one SQLite connection)
+eval_store = EvalStore()
+eval_jobs = EvalJobs(lambda: BatchEvaluator(rag_clients.embeddings(), rag_clients.llm(0.2), store=eval_store))
+
+def start_batch_evaluation(path: str = None, records: list[dict] = None) -> str:
+    """Score a JSONL dataset or a list of {question, answer, context} records in the background; returns the job id"""
+    return eval_jobs.submit(records=records, path=path)
+
+def batch_evaluation_status(job_id: str) -> dict | None:
+    return eval_jobs.status(job_id)
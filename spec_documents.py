@@ -0,0 +1,146 @@
+import io
+import os
+import re
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+
+import docx2txt
+import doc2txt
+from docx import Document
+
+from text_cache import text_cache
+
+WORD_EXTENSIONS = (".docx", ".doc")
+
+# Members ranked below the top few by name/size never get their core properties read
+CORE_PROPERTY_CANDIDATES = 3
+
+_CORE_NS = {
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "cp": "http://schemas.openxmlformats.org/package/2006/metadata/core-properties",
+}
+
+# ---------------------------
+# ZIP inspection (nothing is written to disk)
+# ---------------------------
+def list_word_members(zip_path: str) -> list[zipfile.ZipInfo]:
+    """Word members of the archive, read from the central directory only"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return [
+            info for info in zip_ref.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(WORD_EXTENSIONS)
+        ]
+
+def spec_tokens(archive_name: str) -> tuple[str, str]:
+    """('23002-i00', '23002') for '23002-i00.zip'"""
+    stem = os.path.splitext(os.path.basename(archive_name))[0].lower()
+    match = re.match(r"(\d{5})", stem.replace(".", ""))
+    return stem, match.group(1) if match else ""
+
+def docx_core_properties(zip_ref: zipfile.ZipFile, member: str) -> dict:
+    """Title / subject / keywords from docProps/core.xml of a .docx member"""
+    try:
+        with zip_ref.open(member) as raw, zipfile.ZipFile(io.BytesIO(raw.read())) as docx:
+            root = ElementTree.fromstring(docx.read("docProps/core.xml"))
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+        return {}
+    props = {}
+    for key, tag in (("title", "dc:title"), ("subject", "dc:subject"), ("keywords", "cp:keywords")):
+        node = root.find(tag, _CORE_NS)
+        if node is not None and node.text:
+            props[key] = node.text
+    return props
+
+def _name_score(info: zipfile.ZipInfo, archive_stem: str, spec_number: str) -> float:
+    name = os.path.splitext(os.path.basename(info.filename))[0].lower()
+    score = 0.0
+    if name == archive_stem:
+        score += 3
+    elif spec_number and spec_number in name.replace(".", ""):
+        score += 2
+    if re.search(r"cover|annex|attach|change.?history|_cr\d|template", name):
+        score -= 2
+    if info.filename.lower().endswith(".docx"):
+        score += 0.5
+    return score
+
+def rank_word_members(zip_path: str, members: list[zipfile.ZipInfo], archive_name: str) -> list[zipfile.ZipInfo]:
+    """Order candidates by filename pattern and uncompressed size, then docx core properties for the leaders"""
+    archive_stem, spec_number = spec_tokens(archive_name)
+    largest = max((m.file_size for m in members), default=0) or 1
+    scores = {m.filename: _name_score(m, archive_stem, spec_number) + 2 * m.file_size / largest for m in members}
+    ranked = sorted(members, key=lambda m: scores[m.filename], reverse=True)
+
+    spec_dotted = f"{spec_number[:2]}.{spec_number[2:]}" if spec_number else ""
+    if spec_dotted and len(ranked) > 1:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            for m in ranked[:CORE_PROPERTY_CANDIDATES]:
+                if not m.filename.lower().endswith(".docx"):
+                    continue
+                props = " ".join(docx_core_properties(zip_ref, m.filename).values())
+                if spec_dotted in props:
+                    scores[m.filename] += 1
+        ranked.sort(key=lambda m: scores[m.filename], reverse=True)
+    return ranked
+
+def select_main_member(zip_path: str, archive_name: str, members: list[zipfile.ZipInfo] = None) -> str | None:
+    members = list_word_members(zip_path) if members is None else members
+    if not members:
+        return None
+    return rank_word_members(zip_path, members, archive_name)[0].filename
+
+# ---------------------------
+# Text extraction for a single member
+# ---------------------------
+def _extract_uncached(data: bytes, ext: str) -> str:
+    if ext == ".docx":
+        try:
+            return docx2txt.process(io.BytesIO(data)) or ""
+        except Exception as e:
+            print(f"Error extracting .docx: {e}")
+            return ""
+    elif ext == ".doc":
+        fd, tmp_path = tempfile.mkstemp(suffix=".doc")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            return doc2txt.extract_text(tmp_path) or ""
+        except Exception as e:
+            print(f"Error extracting .doc: {e}")
+            return ""
+        finally:
+            os.remove(tmp_path)
+    else:
+        return ""
+
+def extract_word_bytes(data: bytes, ext: str) -> str:
+    """Extract text from Word bytes, served from the content-addressed text cache when seen before"""
+    ext = ext.lower()
+    return text_cache.get_or_extract(data, ext, lambda: _extract_uncached(data, ext))
+
+def extract_member_text(zip_path: str, member: str) -> str:
+    """Extract text from one Word member; .docx is read from memory, .doc needs a temp file for doc2txt"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        data = zip_ref.read(member)
+    return extract_word_bytes(data, os.path.splitext(member)[1])
+
+def extract_main_document(zip_path: str, archive_name: str) -> dict:
+    """Pick the main Word member and extract its text in one pass.
+
+    Returns {"members": <number of Word members>, "main": <member name or None>, "text": <text>}.
+    """
+    members = list_word_members(zip_path)
+    main = select_main_member(zip_path, archive_name, members) if members else None
+    text = extract_member_text(zip_path, main) if main else ""
+    return {"members": len(members), "main": main, "text": text}
+
+# ---------------------------
+# Summary document
+# ---------------------------
+def save_summary_to_docx(summary: str, comparison: str, filepath: str, doc_name: str) -> None:
+    doc = Document()
+    doc.add_heading(f"Summary for {doc_name}", 0)
+    doc.add_heading("Overview (1-2 pages):", level=1)
+    doc.add_paragraph(summary)
+    doc.save(filepath)
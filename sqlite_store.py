@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# ---------------------------
+# Shared connection
+# ---------------------------
+class SqliteStore:
+    """One lazily opened SQLite connection in WAL mode, shared by the threads of a process.
+
+    Subclasses list their CREATE statements in `schema` and hold `_lock` around every use of
+    `_connect()`. The connection is reopened after a fork, so worker processes never share a handle.
+    """
+
+    schema: tuple[str, ...] = ()
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self.schema:
+                conn.execute(statement)
+            conn.commit()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+# ---------------------------
+# LRU blob store
+# ---------------------------
+class LruBlobStore(SqliteStore):
+    """Blobs keyed by string in one table, evicted least-recently-used past `max_bytes`.
+
+    Several processes (and app instances) may write the same file, so hit/miss counters and the
+    size total live in the database rather than on the instance; stats() from any of them sees all.
+    """
+
+    def __init__(self, path: str | Path, table: str, value_column: str, max_bytes: int):
+        super().__init__(path)
+        self.table = table
+        self.value_column = value_column
+        self.max_bytes = max_bytes
+        self.schema = (
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                {value_column} BLOB,
+                size INTEGER,
+                last_used REAL
+            )""",
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table}(last_used)",
+            f"CREATE TABLE IF NOT EXISTS {table}_counters (name TEXT PRIMARY KEY, value INTEGER)",
+            f"INSERT OR IGNORE INTO {table}_counters (name, value) VALUES ('hits', 0), ('misses', 0)",
+        )
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        found: dict[str, bytes] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            conn = self._connect()
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                marks = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT key, {self.value_column} FROM {self.table} WHERE key IN ({marks})", batch).fetchall()
+                if rows:
+                    conn.execute(
+                        f"UPDATE {self.table} SET last_used = ? WHERE key IN ({','.join('?' * len(rows))})",
+                        [time.time(), *(key for key, _ in rows)]
+                    )
+                found.update(rows)
+            conn.executemany(
+                f"UPDATE {self.table}_counters SET value = value + ? WHERE name = ?",
+                [(len(found), "hits"), (len(unique) - len(found), "misses")]
+            )
+            conn.commit()
+        return found
+
+    def put_many(self, items: dict[str, bytes]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, {self.value_column}, size, last_used) VALUES (?, ?, ?, ?)",
+                [(key, blob, len(blob), now) for key, blob in items.items()]
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _total_bytes(self, conn: sqlite3.Connection) -> int:
+        # Summed from the table, as a running total per instance would drift
+        return conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = self._total_bytes(conn)
+        while total > self.max_bytes:
+            rows = conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_used LIMIT 256").fetchall()
+            if not rows:
+                return
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            entries, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+            counters = dict(conn.execute(f"SELECT name, value FROM {self.table}_counters").fetchall())
+            return {"hits": counters["hits"], "misses": counters["misses"], "entries": entries, "bytes": total}
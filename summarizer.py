@@ -0,0 +1,314 @@
+import asyncio
+import hashlib
+import re
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from llm.llm_endpoints import chat_completion
+from sqlite_store import SqliteStore
+
+CHUNK_SIZE = 3000
+MAX_CONCURRENT_LLM_CALLS = 4
+# Budget for the final digest; ~4 characters per token is close enough for English spec text
+SUMMARY_TOKEN_BUDGET = 3000
+CHARS_PER_TOKEN = 4
+
+# Shared by every summarizer in the process, so overlapping crawls stay within one LLM call limit
+_llm_slots = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+
+MAP_SYSTEM_INSTRUCTION = "Summarize this technical content for a standards update digest. Focus on key changes, new features, and important scope."
+REDUCE_SYSTEM_INSTRUCTION = (
+    "Merge these partial summaries of one telecom standard into a single digest. "
+    "Keep key changes, new features, and important scope; drop repetition."
+)
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def split_chunks(text: str, chunk_size: int = CHUNK_SIZE) -> list[str]:
+    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+
+# Clause headings such as "5.2.1 General" or "Annex B (normative):" start a new clause
+CLAUSE_HEADING = re.compile(r"^\s*(\d{1,2}(\.\d+)*|Annex\s+[A-Z](\.\d+)*)\s+\S")
+# About one subclause heading in CLAUSE_ANCHOR_EVERY also starts a new packing group
+CLAUSE_ANCHOR_EVERY = 8
+
+def split_clauses(text: str) -> list[str]:
+    clauses, current = [], []
+    for line in text.splitlines():
+        if CLAUSE_HEADING.match(line) and any(l.strip() for l in current):
+            clauses.append("\n".join(current))
+            current = []
+        current.append(line)
+    if any(l.strip() for l in current):
+        clauses.append("\n".join(current))
+    return clauses
+
+def _is_anchor(clause: str) -> bool:
+    heading = clause.strip().splitlines()[0].strip()
+    match = CLAUSE_HEADING.match(heading)
+    if match and "." not in match.group(1):
+        return True
+    return int(hashlib.sha256(heading.encode("utf-8")).hexdigest()[:8], 16) % CLAUSE_ANCHOR_EVERY == 0
+
+def clause_groups(clauses: list[str]) -> list[list[str]]:
+    """Runs of clauses that each start at an anchor clause (a top-level clause or annex, or a
+    heading whose hash picks it); the choice depends only on the heading text"""
+    groups = []
+    for clause in clauses:
+        if not groups or _is_anchor(clause):
+            groups.append([])
+        groups[-1].append(clause)
+    return groups
+
+def _pack_clauses(clauses: list[str], chunk_size: int) -> list[str]:
+    """Small clauses packed together, long ones split on line breaks"""
+    chunks, current = [], ""
+    for clause in clauses:
+        if len(clause) > chunk_size:
+            if current:
+                chunks.append(current)
+                current = ""
+            piece = ""
+            for para in clause.split("\n"):
+                if piece and len(piece) + len(para) + 1 > chunk_size:
+                    chunks.append(piece)
+                    piece = ""
+                piece = f"{piece}\n{para}" if piece else para
+                while len(piece) > chunk_size:
+                    chunks.append(piece[:chunk_size])
+                    piece = piece[chunk_size:]
+            if piece:
+                chunks.append(piece)
+        elif current and len(current) + len(clause) + 1 > chunk_size:
+            chunks.append(current)
+            current = clause
+        else:
+            current = f"{current}\n{clause}" if current else clause
+    if current:
+        chunks.append(current)
+    return chunks
+
+def clause_chunks(text: str, chunk_size: int = CHUNK_SIZE) -> list[str]:
+    """Clause-aligned chunks. Clauses are packed within their group only, so an edit can move
+    chunk boundaries inside its own group but never shifts the chunks of any other group."""
+    return [chunk for group in clause_groups(split_clauses(text)) for chunk in _pack_clauses(group, chunk_size)]
+
+def chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+# About one part in REDUCE_ANCHOR_EVERY starts a new merge group
+REDUCE_ANCHOR_EVERY = 4
+
+def group_within_budget(parts: list[str], token_budget: int) -> list[list[str]]:
+    """Consecutive groups of `parts` whose combined size fits `token_budget` (at least two per group
+    when there are at least two parts). A group also starts at a part whose hash picks it, so a changed
+    part only regroups the parts up to the next such anchor."""
+    groups, current, used = [], [], 0
+    for part in parts:
+        cost = estimate_tokens(part)
+        anchor = int(chunk_hash(part)[:8], 16) % REDUCE_ANCHOR_EVERY == 0
+        if len(current) >= 2 and (anchor or used + cost > token_budget):
+            groups.append(current)
+            current, used = [], 0
+        current.append(part)
+        used += cost
+    if current:
+        groups.append(current)
+    return groups
+
+def merge_prompt(group: list[str]) -> str:
+    return "\n\n---\n\n".join(group)
+
+class MapReduceSummarizer:
+    """Summarizes chunks concurrently (order preserved), then merges the chunk summaries
+    level by level until the digest fits the token budget. At most MAX_CONCURRENT_LLM_CALLS
+    LLM calls run at once across all instances."""
+
+    def __init__(
+        self,
+        complete: Callable[..., str] = chat_completion,
+        token_budget: int = SUMMARY_TOKEN_BUDGET,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ):
+        self._complete = complete
+        self.token_budget = token_budget
+        self._on_progress = on_progress
+
+    def _progress(self, msg: str):
+        if self._on_progress:
+            self._on_progress(msg)
+
+    async def _call(self, user_prompt: str, system_instruction: str) -> str:
+        async with _llm_slots:
+            # chat_completion is synchronous; keep it off the event loop thread
+            return await asyncio.to_thread(self._complete, user_prompt=user_prompt, system_instruction=system_instruction)
+
+    async def summarize_chunk(self, idx: int, chunk: str) -> str:
+        return await self._call(
+            f"Summarize the following telecom standard document content (chunk {idx+1}):\n\n{chunk}",
+            MAP_SYSTEM_INSTRUCTION
+        )
+
+    async def map_chunks(self, chunks: list[str]) -> list[str]:
+        done = 0
+
+        async def run(idx: int, chunk: str) -> str:
+            nonlocal done
+            summary = await self.summarize_chunk(idx, chunk)
+            done += 1
+            self._progress(f"Summarized chunk {done}/{len(chunks)}")
+            return summary
+
+        return list(await asyncio.gather(*(run(idx, chunk) for idx, chunk in enumerate(chunks))))
+
+    async def merge(self, group: list[str]) -> str:
+        if len(group) == 1:
+            return group[0]
+        return await self._call(merge_prompt(group), REDUCE_SYSTEM_INSTRUCTION)
+
+    async def reduce(self, summaries: list[str], merge: Optional[Callable[[list[str]], Awaitable[str]]] = None) -> str:
+        merge = merge or self.merge
+        level = 0
+        while len(summaries) > 1 and estimate_tokens("\n\n".join(summaries)) > self.token_budget:
+            level += 1
+            groups = group_within_budget(summaries, self.token_budget)
+            self._progress(f"Merging {len(summaries)} summaries into {len(groups)} (level {level})")
+            summaries = list(await asyncio.gather(*(merge(group) for group in groups)))
+        return "\n\n".join(summaries)
+
+    async def summarize(self, text: str, chunk_size: int = CHUNK_SIZE) -> str:
+        chunks = split_chunks(text, chunk_size)
+        self._progress(f"Summarizing {len(chunks)} chunks...")
+        return await self.reduce(await self.map_chunks(chunks))
+
+# ---------------------------
+# Incremental summarization between spec versions
+# ---------------------------
+SUMMARY_STORE_PATH = Path(__file__).with_name("summary_store.db")
+# Unreferenced summaries younger than this are kept, as a summarization still running may need them
+SUMMARY_PRUNE_GRACE = 24 * 3600
+
+class SummaryStore(SqliteStore):
+    """Chunk and merged summaries keyed by the hash of their input, plus the last summarized
+    version of each spec and the summaries it used"""
+
+    schema = (
+        """CREATE TABLE IF NOT EXISTS chunk_summaries (
+            hash TEXT PRIMARY KEY,
+            summary TEXT,
+            created REAL
+        )""",
+        """CREATE TABLE IF NOT EXISTS spec_versions (
+            spec TEXT PRIMARY KEY,
+            version TEXT,
+            updated REAL
+        )""",
+        """CREATE TABLE IF NOT EXISTS spec_summary_refs (
+            spec TEXT,
+            hash TEXT,
+            PRIMARY KEY (spec, hash)
+        )""",
+    )
+
+    def __init__(self, path: str | Path = SUMMARY_STORE_PATH):
+        super().__init__(path)
+
+    def get_summaries(self, hashes: list[str]) -> dict[str, str]:
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            unique = list(dict.fromkeys(hashes))
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i+500]
+                rows = conn.execute(
+                    f"SELECT hash, summary FROM chunk_summaries WHERE hash IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_summaries(self, summaries: dict[str, str]):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunk_summaries (hash, summary, created) VALUES (?, ?, ?)",
+                [(h, summary, now) for h, summary in summaries.items()]
+            )
+            conn.commit()
+
+    def get_previous(self, spec: str) -> str | None:
+        with self._lock:
+            row = self._connect().execute("SELECT version FROM spec_versions WHERE spec = ?", (spec,)).fetchone()
+        return row[0] if row else None
+
+    def put_version(self, spec: str, version: str, hashes: set[str]):
+        """Record `version` as the latest of `spec`, using the summaries in `hashes`, and drop
+        summaries no spec's latest version uses any more"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO spec_versions (spec, version, updated) VALUES (?, ?, ?)",
+                (spec, version, now)
+            )
+            conn.execute("DELETE FROM spec_summary_refs WHERE spec = ?", (spec,))
+            conn.executemany("INSERT INTO spec_summary_refs (spec, hash) VALUES (?, ?)", [(spec, h) for h in hashes])
+            conn.execute(
+                "DELETE FROM chunk_summaries WHERE created < ? AND hash NOT IN (SELECT hash FROM spec_summary_refs)",
+                (now - SUMMARY_PRUNE_GRACE,)
+            )
+            conn.commit()
+
+class IncrementalSummarizer(MapReduceSummarizer):
+    """Map-reduce summarizer that only sends chunks and merge groups it has not summarized before to the LLM"""
+
+    def __init__(self, *args, store: Optional[SummaryStore] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = store or SummaryStore()
+
+    async def summarize_version(self, spec: str, version: str, text: str, chunk_size: int = CHUNK_SIZE) -> tuple[str, dict]:
+        """Summarize `version` of `spec`, reusing stored summaries of unchanged chunks.
+
+        A chunk is re-summarized only when its hash is not in the store, i.e. when one of its
+        clauses changed; likewise a merge group is re-merged only when one of its inputs changed.
+        Returns (digest, stats) where stats has previous_version, chunks, reused and merges_reused.
+        """
+        previous = self.store.get_previous(spec)
+        chunks = clause_chunks(text, chunk_size)
+        hashes = [chunk_hash(c) for c in chunks]
+        cached = self.store.get_summaries(hashes)
+        todo = [(idx, chunk) for idx, (chunk, h) in enumerate(zip(chunks, hashes)) if h not in cached]
+        self._progress(f"Summarizing {len(todo)} of {len(chunks)} chunks ({len(chunks) - len(todo)} reused)...")
+
+        fresh = await self.map_chunks([chunk for _, chunk in todo])
+        new_summaries = {hashes[idx]: summary for (idx, _), summary in zip(todo, fresh)}
+        if new_summaries:
+            self.store.put_summaries(new_summaries)
+        cached.update(new_summaries)
+
+        used, merges_reused = set(hashes), 0
+
+        async def merge(group: list[str]) -> str:
+            nonlocal merges_reused
+            if len(group) == 1:
+                return group[0]
+            key = chunk_hash(merge_prompt(group))
+            used.add(key)
+            stored = self.store.get_summaries([key])
+            if key in stored:
+                merges_reused += 1
+                return stored[key]
+            merged = await self.merge(group)
+            self.store.put_summaries({key: merged})
+            return merged
+
+        digest = await self.reduce([cached[h] for h in hashes], merge)
+        self.store.put_version(spec, version, used)
+        return digest, {
+            "previous_version": previous,
+            "chunks": len(chunks),
+            "reused": len(chunks) - len(todo),
+            "merges_reused": merges_reused,
+        }
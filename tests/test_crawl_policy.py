@@ -0,0 +1,57 @@
+import random
+
+from crawl_policy import AdaptiveCrawlPolicy
+
+DAY = 24 * 3600.0
+
+class FakeClock:
+    def __init__(self, now: float = 100 * DAY):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def _policy(clock: FakeClock, jitter: float = 0.0, seed: int = 0) -> AdaptiveCrawlPolicy:
+    return AdaptiveCrawlPolicy(backoff_factor=2.0, max_backoff=8.0, jitter=jitter, clock=clock, rng=random.Random(seed))
+
+def test_learned_interval_and_update_window():
+    clock = FakeClock()
+    policy = _policy(clock)
+    # Versions appeared every 10 days; the last one 5 days ago
+    policy.load_history(1, [clock.now - 25 * DAY, clock.now - 15 * DAY, clock.now - 5 * DAY])
+    for _ in range(3):
+        policy.record_poll(1, changed=False)
+    assert not policy.in_update_window(1)
+    assert policy.next_interval(1, 3600) == 8 * 3600
+
+    # 7.5 days (0.75 of the learned 10) after the last change, polling drops to the configured frequency
+    clock.now += 2.5 * DAY
+    assert policy.in_update_window(1)
+    assert policy.next_interval(1, 3600) == 3600
+
+    # Without two past versions there is nothing to learn from
+    policy.load_history(2, [clock.now - DAY])
+    assert not policy.in_update_window(2)
+    assert not policy.in_update_window(3)
+
+def test_backoff_grows_caps_and_resets_on_change():
+    clock = FakeClock()
+    policy = _policy(clock)
+    intervals = []
+    for _ in range(5):
+        intervals.append(policy.next_interval(1, 60))
+        policy.record_poll(1, changed=False)
+    assert intervals == [60, 120, 240, 480, 480]
+
+    policy.record_poll(1, changed=True)
+    assert policy.next_interval(1, 60) == 60
+
+def test_jitter_stays_within_bounds():
+    clock = FakeClock()
+    policy = _policy(clock, jitter=0.1, seed=42)
+    for polls in range(6):
+        base = 60 * min(2.0 ** polls, 8.0)
+        for _ in range(50):
+            interval = policy.next_interval(1, 60)
+            assert 0.9 * base <= interval <= 1.1 * base
+        policy.record_poll(1, changed=False)
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from mcp_client_pool import CircuitBreaker, CircuitOpenError, McpClientPool
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeClient:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.release.set()
+        self.calls = 0
+
+    async def call_tool(self, name, arguments):
+        self.calls += 1
+        await self.release.wait()
+        return f"{name} ok"
+
+    async def ping(self):
+        return True
+
+    async def __aexit__(self, *exc):
+        return None
+
+def _pool(client: FakeClient, clock: FakeClock, size: int = 1) -> McpClientPool:
+    async def open_client():
+        return client, "fake"
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1.0, clock=clock)
+    return McpClientPool(open_client, size=size, ping_interval=0, breaker=breaker)
+
+def _trip(pool: McpClientPool, clock: FakeClock):
+    pool.breaker.record_failure()
+    assert pool.breaker.state == "open"
+    clock.now += 5
+
+def test_cancelled_probe_during_call_releases_half_open():
+    async def scenario():
+        clock, client = FakeClock(), FakeClient()
+        pool = _pool(client, clock)
+        _trip(pool, clock)
+        client.release.clear()
+        probe = asyncio.create_task(pool.call_tool("fetch_url", {}))
+        await asyncio.sleep(0.01)
+        assert pool.breaker.state == "half_open"
+        with pytest.raises(CircuitOpenError):
+            await pool.call_tool("fetch_url", {})
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        client.release.set()
+        result = await pool.call_tool("fetch_url", {})
+        await pool.close()
+        return result, pool.breaker.state
+
+    result, state = asyncio.run(scenario())
+    assert result == "fetch_url ok"
+    assert state == "closed"
+
+def test_cancelled_probe_waiting_for_slot_releases_half_open():
+    async def scenario():
+        clock, client = FakeClock(), FakeClient()
+        pool = _pool(client, clock, size=1)
+        client.release.clear()
+        busy = asyncio.create_task(pool.call_tool("parse_version", {}))
+        await asyncio.sleep(0.01)
+        _trip(pool, clock)
+        # The probe is let through by the breaker but waits for the only slot
+        probe = asyncio.create_task(pool.call_tool("fetch_url", {}))
+        await asyncio.sleep(0.01)
+        assert pool.waiting == 1
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # The call holding the slot is cancelled too, so nothing reports a verdict on the server
+        busy.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await busy
+        client.release.set()
+        result = await pool.call_tool("fetch_url", {})
+        await pool.close()
+        return result, pool.breaker.state
+
+    result, state = asyncio.run(scenario())
+    assert result == "fetch_url ok"
+    assert state == "closed"
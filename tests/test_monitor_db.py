@@ -0,0 +1,55 @@
+import asyncio
+import sqlite3
+
+from monitor_db import MonitorRepository
+
+def _legacy_db(path):
+    # The files table as created before first_seen was added
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """CREATE TABLE files (
+               id INTEGER PRIMARY KEY,
+               filename TEXT UNIQUE,
+               url TEXT,
+               status TEXT,
+               last_checked TEXT
+           )"""
+    )
+    conn.execute(
+        "INSERT INTO files (filename, url, status, last_checked) VALUES (?, ?, ?, ?)",
+        ("23002-i00.zip", "https://example.org/23.002/", "New", "2025-01-01T00:00:00")
+    )
+    conn.commit()
+    conn.close()
+
+def test_init_schema_migrates_database_without_first_seen(tmp_path):
+    path = str(tmp_path / "monitor.db")
+    _legacy_db(path)
+    repo = MonitorRepository(path)
+    try:
+        repo.init_schema()
+
+        async def exercise():
+            await repo.add_file("23002-i10.zip", "https://example.org/23.002/", "New")
+            return await repo.get_latest_file("https://example.org/23.002/"), await repo.get_update_times("https://example.org/23.002/")
+
+        latest, update_times = asyncio.run(exercise())
+    finally:
+        repo.close()
+
+    assert latest["filename"] == "23002-i10.zip"
+    # The legacy row has no first_seen and is left out of the update history
+    assert len(update_times) == 1
+    conn = sqlite3.connect(path)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(files)")]
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list(files)")]
+    conn.close()
+    assert "first_seen" in columns
+    assert "idx_files_url_first_seen" in indexes
+
+def test_init_schema_is_idempotent(tmp_path):
+    path = str(tmp_path / "monitor.db")
+    for _ in range(2):
+        repo = MonitorRepository(path)
+        repo.init_schema()
+        repo.close()
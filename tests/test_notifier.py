@@ -0,0 +1,69 @@
+import asyncio
+import smtplib
+
+import notifier
+from notifier import Notification, RetryableSendError, SmtpTransport, send_notification_batch
+
+class StubTransport:
+    """Answers each send with the next scripted status for its recipient; 429/5xx are raised as retryable"""
+
+    def __init__(self, max_recipients: int, script: dict[str, list[int]]):
+        self.max_recipients = max_recipients
+        self.script = script
+        self.calls: list[list[str]] = []
+
+    async def send(self, note: Notification, recipients: list[str]) -> int:
+        self.calls.append(list(recipients))
+        status = self.script[recipients[0]].pop(0)
+        if status == 429 or status >= 500:
+            raise RetryableSendError(status)
+        return status
+
+def _send(transport, recipients, max_retries=3):
+    note = Notification("subject", "<p>hi</p>", recipients)
+    return asyncio.run(send_notification_batch(note, transport, max_retries=max_retries, base_delay=0))
+
+def test_retries_429_and_5xx_per_group():
+    transport = StubTransport(1, {
+        "a@x.org": [429, 503, 202],
+        "b@x.org": [400],
+        "c@x.org": [500, 500, 500],
+    })
+    result = _send(transport, ["a@x.org", "b@x.org", "c@x.org", "a@x.org"], max_retries=2)
+
+    assert result["statuses"] == {"a@x.org": 202, "b@x.org": 400, "c@x.org": 500}
+    assert (result["sent"], result["failed"]) == (1, 2)
+    # Duplicates are sent once; a 4xx other than 429 is not retried
+    assert [call for call in transport.calls if call == ["a@x.org"]] == [["a@x.org"]] * 3
+    assert transport.calls.count(["b@x.org"]) == 1
+    assert transport.calls.count(["c@x.org"]) == 3
+
+def test_multi_recipient_requests_share_one_status():
+    transport = StubTransport(2, {"a@x.org": [502, 202], "c@x.org": [202]})
+    result = _send(transport, ["a@x.org", "b@x.org", "c@x.org"])
+
+    assert result["statuses"] == {"a@x.org": 202, "b@x.org": 202, "c@x.org": 202}
+    assert transport.calls == [["a@x.org", "b@x.org"], ["c@x.org"], ["a@x.org", "b@x.org"]]
+
+class RefusingSmtp:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self):
+        raise smtplib.SMTPNotSupportedError("STARTTLS extension not supported by server.")
+
+    def send_message(self, msg):
+        raise smtplib.SMTPRecipientsRefused({msg["To"]: (550, b"5.1.1 No such user")})
+
+def test_smtp_refusals_are_not_retried(monkeypatch):
+    monkeypatch.setattr(notifier.smtplib, "SMTP", RefusingSmtp)
+    note = Notification("subject", "<p>hi</p>", ["gone@x.org"])
+
+    assert SmtpTransport(host="stub", port=25)._send_sync(note, "gone@x.org") == 550
+    assert SmtpTransport(host="stub", port=25, starttls=True)._send_sync(note, "gone@x.org") == 502
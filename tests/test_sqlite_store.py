@@ -0,0 +1,26 @@
+from sqlite_store import LruBlobStore
+from text_cache import TextCache
+
+def _store(path, max_bytes=1000) -> LruBlobStore:
+    return LruBlobStore(path, table="blobs", value_column="body", max_bytes=max_bytes)
+
+def test_eviction_counts_every_writer(tmp_path):
+    path = tmp_path / "cache.db"
+    first, second = _store(path), _store(path)
+    first.put_many({f"a{i}": b"x" * 300 for i in range(3)})
+    first.get_many(["a0"])
+    # The second instance's writes push the shared file past the limit; the least recently used go first
+    second.put_many({"b0": b"y" * 300})
+
+    assert set(second.get_many(["a0", "a1", "a2", "b0"])) == {"a0", "a2", "b0"}
+    assert first.stats()["bytes"] == 900
+
+def test_counters_are_shared_between_instances(tmp_path):
+    path = tmp_path / "text_cache.db"
+    first, second = TextCache(path), TextCache(path)
+    first.put("k", "extracted text")
+
+    assert second.get("k") == "extracted text"
+    assert first.get("missing") is None
+    stats = second.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
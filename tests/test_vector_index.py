@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from vector_index import MmapVectorIndex, flatten_where
+
+KEYS = ("standard_name", "standard_version")
+
+def test_flatten_where_supported_filters():
+    where = {"$and": [{"standard_name": {"$in": ["TS 1", "TS 2"]}}, {"standard_name": "TS 2"}, {"standard_version": {"$eq": 18}}]}
+    assert flatten_where(where, KEYS) == {"standard_name": {"TS 2"}, "standard_version": {"18"}}
+    assert flatten_where(None, KEYS) == {}
+
+@pytest.mark.parametrize("where", [
+    {"$or": [{"standard_name": "TS 1"}, {"standard_name": "TS 2"}]},
+    {"chunk_id": 3},
+    {"standard_name": {"$ne": "TS 1"}},
+    {"standard_version": {"$in": "18"}},
+])
+def test_flatten_where_rejects_unsupported_filters(where):
+    with pytest.raises(ValueError):
+        flatten_where(where, KEYS)
+
+def test_search_filters_by_partition_and_version(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 8))
+    metadatas = [{"standard_name": f"TS {i % 4}", "standard_version": f"{i % 3}"} for i in range(200)]
+    index = MmapVectorIndex.build(str(tmp_path), [f"id{i}" for i in range(200)], vectors, [f"doc {i}" for i in range(200)], metadatas)
+
+    hits = index.similarity_search(vectors[5], k=10, where={"standard_name": {"$in": ["TS 1", "TS 2"]}, "standard_version": "2"})
+    assert hits[0].page_content == "doc 5"
+    assert all(h.metadata["standard_name"] in ("TS 1", "TS 2") and h.metadata["standard_version"] == "2" for h in hits)
+
+def test_build_rejects_empty_input(tmp_path):
+    with pytest.raises(ValueError, match="no rows"):
+        MmapVectorIndex.build(str(tmp_path), [], np.zeros((0, 8)), [], [])
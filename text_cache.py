@@ -0,0 +1,39 @@
+import hashlib
+import zlib
+from pathlib import Path
+
+from sqlite_store import LruBlobStore
+
+TEXT_CACHE_PATH = Path(__file__).with_name("text_cache.db")
+TEXT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def content_key(data: bytes, kind: str) -> str:
+    """Cache key for `data` extracted by extractor `kind` (e.g. the file extension)"""
+    return f"{kind}:{hashlib.sha256(data).hexdigest()}"
+
+class TextCache(LruBlobStore):
+    """Extracted text keyed by content hash, zlib-compressed in SQLite and evicted least-recently-used
+    past `max_bytes`. Extraction runs in document worker processes; the counters and size total
+    are kept in the database, so stats() from any process sees them all."""
+
+    def __init__(self, path: str | Path = TEXT_CACHE_PATH, max_bytes: int = TEXT_CACHE_MAX_BYTES):
+        super().__init__(path, table="text_cache", value_column="body", max_bytes=max_bytes)
+
+    def get(self, key: str) -> str | None:
+        body = self.get_many([key]).get(key)
+        return None if body is None else zlib.decompress(body).decode("utf-8")
+
+    def put(self, key: str, text: str):
+        self.put_many({key: zlib.compress(text.encode("utf-8"))})
+
+    def get_or_extract(self, data: bytes, kind: str, extract) -> str:
+        """Return cached text for `data`, or run `extract()` and cache a non-empty result"""
+        key = content_key(data, kind)
+        text = self.get(key)
+        if text is None:
+            text = extract()
+            if text:
+                self.put(key, text)
+        return text
+
+text_cache = TextCache()
@@ -0,0 +1,409 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+VECTOR_DTYPES = ("float32", "float16", "int8")
+SCAN_BLOCK_ROWS = 32_768
+# Name of the file in an index root that holds the live version's directory name
+CURRENT_FILE = "CURRENT"
+KEEP_VERSIONS = 2
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def spherical_kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, sample: int = 50_000, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids for an IVF coarse index, trained on a sample of (unit-norm) vectors"""
+    rng = np.random.default_rng(seed)
+    train = vectors[rng.choice(len(vectors), size=min(sample, len(vectors)), replace=False)]
+    centroids = train[rng.choice(len(train), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(train @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = train[assign == c]
+            # An empty list keeps its old centroid
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32)
+
+def _recode(codes: np.ndarray, first_seen: dict[str, int], names: list[str]) -> np.ndarray:
+    """Map codes assigned in first-seen order onto positions in the sorted `names`"""
+    position = {name: i for i, name in enumerate(names)}
+    table = np.empty(len(first_seen), dtype=np.int32)
+    for name, code in first_seen.items():
+        table[code] = position[name]
+    return table[codes]
+
+def _assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SCAN_BLOCK_ROWS):
+        out[start:start + SCAN_BLOCK_ROWS] = np.argmax(vectors[start:start + SCAN_BLOCK_ROWS] @ centroids.T, axis=1)
+    return out
+
+def _allowed_values(key: str, condition) -> set[str]:
+    if not isinstance(condition, dict):
+        return {str(condition)}
+    if len(condition) != 1:
+        raise ValueError(f"Filter on {key!r} must have exactly one operator, got {sorted(condition)}")
+    (op, value), = condition.items()
+    if op == "$eq":
+        return {str(value)}
+    if op == "$in" and isinstance(value, (list, tuple)):
+        return {str(v) for v in value}
+    raise ValueError(f"Unsupported operator {op!r} on {key!r}; only $eq and $in are supported")
+
+def flatten_where(where: Optional[dict], keys: Iterable[str]) -> dict[str, set[str]]:
+    """Chroma-style filters on `keys` as {key: allowed values}.
+
+    Supports plain equality ({"a": 1}), $eq, $in and $and. Anything else ($or, $ne, other
+    metadata keys) raises ValueError instead of being ignored, which would widen the search.
+    """
+    keys = tuple(keys)
+    flat: dict[str, set[str]] = {}
+    for key, condition in (where or {}).items():
+        if key == "$and":
+            if not isinstance(condition, list):
+                raise ValueError("$and takes a list of filters")
+            clauses = [flatten_where(clause, keys) for clause in condition]
+        elif key not in keys:
+            raise ValueError(f"Unsupported filter {key!r}; only {', '.join(keys)} and $and are supported")
+        else:
+            clauses = [{key: _allowed_values(key, condition)}]
+        for clause in clauses:
+            for name, values in clause.items():
+                flat[name] = flat[name] & values if name in flat else values
+    return flat
+
+# ---------------------------
+# Versions
+# ---------------------------
+def current_version_dir(root: str) -> str:
+    """Directory of the live version under `root`; `root` itself for an unversioned index"""
+    pointer = os.path.join(root, CURRENT_FILE)
+    if not os.path.exists(pointer):
+        return root
+    with open(pointer, "r") as f:
+        return os.path.join(root, f.read().strip())
+
+def _set_current(root: str, version: str):
+    fd, tmp = tempfile.mkstemp(prefix=".current-", dir=root)
+    with os.fdopen(fd, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+
+def prune_versions(root: str, keep: int = KEEP_VERSIONS):
+    """Delete all but the newest `keep` versions under `root`, never the live one.
+
+    A version still open elsewhere is moved aside before deletion, which fails on Windows while
+    its files are mapped; it is then left for the next prune instead of being half-deleted.
+    """
+    current = os.path.basename(current_version_dir(root))
+    versions = sorted(name for name in os.listdir(root) if name.startswith("v") and os.path.isdir(os.path.join(root, name)))
+    for name in versions[:max(0, len(versions) - keep)]:
+        if name == current:
+            continue
+        trash = os.path.join(root, f".trash-{name}")
+        try:
+            os.rename(os.path.join(root, name), trash)
+        except OSError:
+            continue
+        shutil.rmtree(trash, ignore_errors=True)
+
+# ---------------------------
+# Index
+# ---------------------------
+class MmapVectorIndex:
+    """Read-only vector index on memory-mapped files.
+
+    Rows are unit-normalized and sorted by partition (standard_name) and then by IVF list, so
+    a filtered search only scans the contiguous row ranges of the matching partition and, with
+    IVF, of the `nprobe` closest lists. Vectors are stored as float32, float16, or int8 with a
+    per-row scale. standard_version is a small integer column checked inside the scanned
+    ranges. Documents and full metadata are in SQLite and are only read for the top k rows.
+
+    Files: manifest.json, vectors.bin, scales.npy (int8), versions.npy, offsets.npy,
+    centroids.npy (IVF), rows.db. build() writes each index into a new version directory under
+    the index root and then switches the root's CURRENT pointer, so an instance opened earlier
+    keeps reading its own, unchanged files.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json"), "r") as f:
+            self.manifest = json.load(f)
+        self.dtype = self.manifest["dtype"]
+        self.dim = self.manifest["dim"]
+        self.count = self.manifest["count"]
+        self.partition_key = self.manifest["partition_key"]
+        self.partitions = {name: i for i, name in enumerate(self.manifest["partitions"])}
+        self.versions = {name: i for i, name in enumerate(self.manifest["versions"])}
+        self.vectors = np.memmap(os.path.join(directory, "vectors.bin"), dtype=self.dtype, mode="r", shape=(self.count, self.dim))
+        self.scales = np.load(os.path.join(directory, "scales.npy"), mmap_mode="r") if self.dtype == "int8" else None
+        self.version_codes = np.load(os.path.join(directory, "versions.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(directory, "offsets.npy"))
+        centroids_path = os.path.join(directory, "centroids.npy")
+        self.centroids = np.load(centroids_path) if os.path.exists(centroids_path) else None
+        # Opened now, so this instance keeps working after prune_versions moves its directory
+        self._rows = sqlite3.connect(f"file:{os.path.join(directory, 'rows.db')}?mode=ro", uri=True, check_same_thread=False)
+        self._rows_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, root: str) -> "MmapVectorIndex":
+        """The live version of the index at `root`"""
+        return cls(current_version_dir(root))
+
+    # --- build ---
+    @classmethod
+    def build(cls, root: str, ids: list[str], vectors, documents: list[str], metadatas: list[dict],
+              dtype: str = "float32", ivf_lists: int = 0, partition_key: str = "standard_name", seed: int = 0,
+              keep_versions: int = KEEP_VERSIONS) -> "MmapVectorIndex":
+        """Write a new version of the index under `root`, make it the live one, and open it"""
+        return cls._build_version(root, [(ids, vectors, documents, metadatas)], len(ids),
+                                  dtype, ivf_lists, partition_key, seed, keep_versions)
+
+    @classmethod
+    def _build_version(cls, root: str, pages: Iterable[tuple], count: int, dtype: str = "float32", ivf_lists: int = 0,
+                       partition_key: str = "standard_name", seed: int = 0, keep_versions: int = KEEP_VERSIONS) -> "MmapVectorIndex":
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"dtype must be one of {VECTOR_DTYPES}")
+        if count <= 0:
+            raise ValueError("Cannot build a vector index with no rows (is the collection empty?)")
+        os.makedirs(root, exist_ok=True)
+        # Millisecond prefix keeps version names in build order
+        version = f"v{int(time.time() * 1000):015d}-{uuid.uuid4().hex[:6]}"
+        staging = tempfile.mkdtemp(prefix=".building-", dir=root)
+        try:
+            cls._write(staging, pages, count, dtype, ivf_lists, partition_key, seed)
+            os.rename(staging, os.path.join(root, version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        _set_current(root, version)
+        prune_versions(root, keep_versions)
+        return cls(os.path.join(root, version))
+
+    @staticmethod
+    def _write(directory: str, pages: Iterable[tuple], count: int, dtype: str, ivf_lists: int, partition_key: str, seed: int):
+        """Write `pages` of (ids, vectors, documents, metadatas), at most `count` rows in all, into `directory`.
+
+        Each page goes straight to disk: normalized vectors into a float32 scratch memmap and rows
+        into a scratch SQLite file. Only the per-row partition, version and list codes stay in memory.
+        """
+        scratch_vectors = os.path.join(directory, "unsorted.f32")
+        scratch_rows = os.path.join(directory, "unsorted.db")
+        pending = sqlite3.connect(scratch_rows)
+        pending.execute("CREATE TABLE pending (src INTEGER PRIMARY KEY, id TEXT, document TEXT, metadata TEXT)")
+        # Codes in first-seen order until every name is known
+        part_names: dict[str, int] = {}
+        version_names: dict[str, int] = {}
+        part_codes = np.empty(count, dtype=np.int32)
+        version_codes = np.empty(count, dtype=np.int32)
+        unsorted = None
+        written = 0
+        for ids, page_vectors, documents, metadatas in pages:
+            if not len(ids):
+                continue
+            block = _normalize(np.asarray(page_vectors, dtype=np.float32))
+            end = written + len(ids)
+            if end > count:
+                raise ValueError(f"Got more than the expected {count} rows")
+            if unsorted is None:
+                unsorted = np.memmap(scratch_vectors, dtype=np.float32, mode="w+", shape=(count, block.shape[1]))
+            unsorted[written:end] = block
+            metadatas = [m or {} for m in metadatas]
+            part_codes[written:end] = [part_names.setdefault(str(m.get(partition_key, "")), len(part_names)) for m in metadatas]
+            version_codes[written:end] = [version_names.setdefault(str(m.get("standard_version", "")), len(version_names)) for m in metadatas]
+            pending.executemany(
+                "INSERT INTO pending (src, id, document, metadata) VALUES (?, ?, ?, ?)",
+                zip(range(written, end), ids, documents, (json.dumps(m) for m in metadatas))
+            )
+            written = end
+        pending.commit()
+        pending.close()
+        if not written:
+            raise ValueError("Cannot build a vector index with no rows (is the collection empty?)")
+        unsorted.flush()
+        vectors = unsorted[:written]
+        dim = vectors.shape[1]
+
+        partitions = sorted(part_names)
+        versions = sorted(version_names)
+        part_codes = _recode(part_codes[:written], part_names, partitions)
+        version_codes = _recode(version_codes[:written], version_names, versions)
+
+        n_lists = min(ivf_lists, written) if ivf_lists else 1
+        centroids = None
+        if n_lists > 1:
+            centroids = spherical_kmeans(vectors, n_lists, seed=seed)
+            lists = _assign_lists(vectors, centroids)
+        else:
+            lists = np.zeros(written, dtype=np.int32)
+
+        order = np.lexsort((lists, part_codes))
+        part_codes, lists, version_codes = part_codes[order], lists[order], version_codes[order]
+
+        # offsets[p, l] .. offsets[p, l + 1] are the rows of partition p in list l
+        counts = np.zeros((len(partitions), n_lists), dtype=np.int64)
+        np.add.at(counts, (part_codes, lists), 1)
+        offsets = np.concatenate([[0], np.cumsum(counts.ravel())]).astype(np.int64)
+
+        out = np.memmap(os.path.join(directory, "vectors.bin"), dtype=dtype, mode="w+", shape=(written, dim))
+        scales = np.empty(written, dtype=np.float32) if dtype == "int8" else None
+        for start in range(0, written, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, written)
+            block = vectors[order[start:end]]
+            if scales is not None:
+                block_scales = np.abs(block).max(axis=1) / 127
+                block_scales[block_scales == 0] = 1
+                out[start:end] = np.round(block / block_scales[:, None]).astype(np.int8)
+                scales[start:end] = block_scales
+            else:
+                out[start:end] = block.astype(dtype)
+        out.flush()
+        # Drop every view of the scratch map so its file can be deleted (Windows refuses while mapped)
+        del out, unsorted, vectors, block
+        os.remove(scratch_vectors)
+        if scales is not None:
+            np.save(os.path.join(directory, "scales.npy"), scales)
+        np.save(os.path.join(directory, "versions.npy"), version_codes)
+        np.save(os.path.join(directory, "offsets.npy"), offsets)
+        if centroids is not None:
+            np.save(os.path.join(directory, "centroids.npy"), centroids)
+
+        conn = sqlite3.connect(os.path.join(directory, "rows.db"))
+        conn.execute("CREATE TABLE rows (row INTEGER PRIMARY KEY, id TEXT, document TEXT, metadata TEXT)")
+        conn.execute("ATTACH DATABASE ? AS scratch", (scratch_rows,))
+        conn.execute("CREATE TEMP TABLE sorted_rows (row INTEGER PRIMARY KEY, src INTEGER)")
+        conn.executemany("INSERT INTO sorted_rows (row, src) VALUES (?, ?)", enumerate(order.tolist()))
+        conn.execute(
+            """INSERT INTO rows (row, id, document, metadata)
+               SELECT s.row, p.id, p.document, p.metadata
+               FROM sorted_rows s JOIN scratch.pending p ON p.src = s.src ORDER BY s.row"""
+        )
+        conn.commit()
+        conn.execute("DETACH DATABASE scratch")
+        conn.close()
+        os.remove(scratch_rows)
+
+        with open(os.path.join(directory, "manifest.json"), "w") as f:
+            json.dump({
+                "dtype": dtype, "dim": dim, "count": written, "partition_key": partition_key,
+                "partitions": partitions, "versions": versions, "ivf_lists": n_lists,
+            }, f)
+
+    @classmethod
+    def from_chroma(cls, collection, root: str, page_size: int = 5000, **kwargs) -> "MmapVectorIndex":
+        """Export a Chroma collection (e.g. Chroma(...)._collection) as a new version of the index at `root`.
+
+        Pages are written to disk as they arrive, so the collection is never held in memory whole.
+        Rows added while exporting are left for the next export.
+        """
+        count = collection.count()
+
+        def pages() -> Iterator[tuple]:
+            offset = 0
+            while offset < count:
+                page = collection.get(include=["embeddings", "documents", "metadatas"],
+                                      limit=min(page_size, count - offset), offset=offset)
+                if not len(page["ids"]):
+                    break
+                yield page["ids"], page["embeddings"], page["documents"], page["metadatas"]
+                offset += len(page["ids"])
+
+        return cls._build_version(root, pages(), count, **kwargs)
+
+    # --- search ---
+    def _ranges(self, parts: Optional[list[int]], lists) -> list[tuple[int, int]]:
+        n_lists = self.manifest["ivf_lists"]
+        parts = range(len(self.partitions)) if parts is None else parts
+        ranges = []
+        for p in parts:
+            for l in lists:
+                start, end = self.offsets[p * n_lists + l], self.offsets[p * n_lists + l + 1]
+                if end > start:
+                    ranges.append((int(start), int(end)))
+        return ranges
+
+    def _scan(self, start: int, end: int, query: np.ndarray, versions: Optional[np.ndarray]) -> np.ndarray:
+        block = self.vectors[start:end]
+        scores = block.astype(np.float32) @ query if self.dtype != "float32" else block @ query
+        if self.scales is not None:
+            scores = scores * self.scales[start:end]
+        if versions is not None:
+            scores = np.where(np.isin(self.version_codes[start:end], versions), scores, -np.inf)
+        return scores
+
+    def search(self, query, k: int = 3, where: Optional[dict] = None, nprobe: int = 8) -> list[tuple[int, float]]:
+        """Top-k (row, cosine score) for `query`, optionally restricted by standard_name/standard_version"""
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        filters = flatten_where(where, (self.partition_key, "standard_version"))
+        parts = versions = None
+        if self.partition_key in filters:
+            parts = sorted(self.partitions[name] for name in filters[self.partition_key] if name in self.partitions)
+            if not parts:
+                return []
+        if "standard_version" in filters:
+            versions = np.array(sorted(self.versions[name] for name in filters["standard_version"] if name in self.versions), dtype=np.int32)
+            if not len(versions):
+                return []
+        if self.centroids is not None:
+            probes = np.argsort(-(self.centroids @ query))[:nprobe]
+        else:
+            probes = [0]
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start, end in self._ranges(parts, probes):
+            for block_start in range(start, end, SCAN_BLOCK_ROWS):
+                block_end = min(block_start + SCAN_BLOCK_ROWS, end)
+                scores = self._scan(block_start, block_end, query, versions)
+                top = np.argpartition(-scores, min(k, len(scores) - 1))[:k] if len(scores) > k else np.arange(len(scores))
+                best_rows = np.concatenate([best_rows, top + block_start])
+                best_scores = np.concatenate([best_scores, scores[top]])
+                if len(best_rows) > 4 * k:
+                    keep = np.argpartition(-best_scores, k)[:k]
+                    best_rows, best_scores = best_rows[keep], best_scores[keep]
+        order = np.argsort(-best_scores)[:k]
+        return [(int(best_rows[i]), float(best_scores[i])) for i in order if np.isfinite(best_scores[i])]
+
+    def rows(self, rows: list[int]) -> list[dict]:
+        if not rows:
+            return []
+        marks = ",".join("?" * len(rows))
+        with self._rows_lock:
+            fetched = self._rows.execute(f"SELECT row, id, document, metadata FROM rows WHERE row IN ({marks})", rows).fetchall()
+        found = {row: {"id": id_, "document": doc, "metadata": json.loads(meta)} for row, id_, doc, meta in fetched}
+        return [found[row] for row in rows]
+
+    def similarity_search(self, query_vector, k: int = 3, where: Optional[dict] = None, nprobe: int = 8) -> list[Document]:
+        hits = self.search(query_vector, k=k, where=where, nprobe=nprobe)
+        return [
+            Document(page_content=row["document"], metadata={**row["metadata"], "score": score})
+            for row, (_, score) in zip(self.rows([r for r, _ in hits]), hits)
+        ]
+
+class MmapRetriever(BaseRetriever):
+    """LangChain retriever over MmapVectorIndex, a drop-in for Chroma's as_retriever()"""
+    index: Any
+    embeddings: Any
+    k: int = 3
+    where: Optional[dict] = None
+    nprobe: int = 8
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        return self.index.similarity_search(self.embeddings.embed_query(query), k=self.k, where=self.where, nprobe=self.nprobe)
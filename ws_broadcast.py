@@ -0,0 +1,158 @@
+import asyncio
+from collections import deque
+from typing import Callable, Optional
+
+from fastapi import WebSocket
+
+# ---------------------------
+# Per-connection channel
+# ---------------------------
+class ClientChannel:
+    """Outgoing messages for one WebSocket, drained by its own writer task.
+
+    Replayed messages (the backlog on connect) are sent first and never dropped. Queued
+    messages (logs) are kept in a bounded deque and the oldest is dropped when it is full; the
+    next message sent after a drop is preceded by a {"type": "gap"} message so the client knows
+    to refetch. Coalesced messages (status) keep only the latest snapshot per type.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue: int):
+        self.websocket = websocket
+        self.replay: deque = deque()
+        self.queue: deque = deque(maxlen=max_queue)
+        self.latest: dict[str, dict] = {}
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+        self.unreported_drops = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.writer: Optional[asyncio.Task] = None
+
+    def enqueue(self, message: dict):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+            self.unreported_drops += 1
+        self.queue.append(message)
+        self.wakeup.set()
+
+    def replace(self, kind: str, message: dict):
+        if kind in self.latest:
+            self.coalesced += 1
+        self.latest[kind] = message
+        self.wakeup.set()
+
+    def next_message(self) -> dict:
+        if self.replay:
+            return self.replay.popleft()
+        if self.queue:
+            if self.unreported_drops:
+                dropped, self.unreported_drops = self.unreported_drops, 0
+                return {"type": "gap", "data": {"dropped": dropped, "next_seq": self.queue[0].get("seq")}}
+            return self.queue.popleft()
+        return self.latest.popitem()[1]
+
+    def pending(self) -> bool:
+        return bool(self.replay or self.queue or self.latest)
+
+    def depth(self) -> int:
+        return len(self.replay) + len(self.queue) + len(self.latest)
+
+# ---------------------------
+# Broadcaster
+# ---------------------------
+class Broadcaster:
+    """Fan-out to dashboard WebSockets that never blocks the publisher.
+
+    `publish` only appends to each connection's channel; a writer task per connection does
+    the actual sends, so a slow client only delays itself. A client whose send takes longer
+    than `send_timeout` is disconnected.
+    """
+
+    def __init__(self, max_queue: int = 256, send_timeout: float = 10.0, coalesce_types: tuple = ("status",)):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.coalesce_types = set(coalesce_types)
+        self.channels: dict[WebSocket, ClientChannel] = {}
+        self.published = 0
+        self.slow_disconnects = 0
+        self.total_dropped = 0
+        self.total_coalesced = 0
+
+    @property
+    def active_connections(self) -> set[WebSocket]:
+        return set(self.channels)
+
+    async def connect(self, websocket: WebSocket, backlog: Optional[Callable[[], list]] = None) -> ClientChannel:
+        """Accept `websocket`; messages returned by `backlog()` go out, all of them, before anything published later.
+
+        `backlog` is called once the socket is accepted, with no await before the channel is
+        registered, so no message falls between the two.
+        """
+        await websocket.accept()
+        channel = ClientChannel(websocket, self.max_queue)
+        channel.replay.extend(backlog() if backlog else ())
+        if channel.replay:
+            channel.wakeup.set()
+        channel.writer = asyncio.create_task(self._writer(channel))
+        self.channels[websocket] = channel
+        return channel
+
+    def disconnect(self, websocket: WebSocket):
+        channel = self.channels.pop(websocket, None)
+        if channel is None:
+            return
+        self.total_dropped += channel.dropped
+        self.total_coalesced += channel.coalesced
+        if channel.writer and channel.writer is not asyncio.current_task():
+            channel.writer.cancel()
+
+    def publish(self, message: dict):
+        """Queue `message` for every connection; safe to call from sync code on the event loop"""
+        self.published += 1
+        kind = message.get("type")
+        for channel in self.channels.values():
+            if kind in self.coalesce_types:
+                channel.replace(kind, message)
+            else:
+                channel.enqueue(message)
+
+    async def broadcast(self, message: dict):
+        self.publish(message)
+
+    async def _writer(self, channel: ClientChannel):
+        try:
+            while True:
+                await channel.wakeup.wait()
+                channel.wakeup.clear()
+                while channel.pending():
+                    message = channel.next_message()
+                    await asyncio.wait_for(channel.websocket.send_json(message), timeout=self.send_timeout)
+                    channel.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.slow_disconnects += 1
+            self.disconnect(channel.websocket)
+            try:
+                await channel.websocket.close(code=1008)
+            except Exception:
+                pass
+        except Exception:
+            self.disconnect(channel.websocket)
+
+    def metrics(self) -> dict:
+        depths = [channel.depth() for channel in self.channels.values()]
+        return {
+            "connections": len(self.channels),
+            "published": self.published,
+            "max_queue": self.max_queue,
+            "queue_depth_max": max(depths, default=0),
+            "queue_depth_total": sum(depths),
+            "dropped": self.total_dropped + sum(c.dropped for c in self.channels.values()),
+            "coalesced": self.total_coalesced + sum(c.coalesced for c in self.channels.values()),
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+    async def close(self):
+        for websocket in list(self.channels):
+            self.disconnect(websocket)